@@ -0,0 +1,59 @@
+import fs from 'fs';
+import path from 'path';
+
+// JSON content bundles produced by `website_scraper.py export` (or --export-dir).
+// Read at build time from content/scraped unless SCRAPED_CONTENT_DIR points elsewhere.
+const CONTENT_DIR = process.env.SCRAPED_CONTENT_DIR || path.join(process.cwd(), 'content', 'scraped');
+const MANIFEST_FILENAME = 'export_manifest.json';
+
+export interface ScrapedImage {
+  url: string;
+  local_path: string | null;
+  alt: string;
+  width: number | null;
+  height: number | null;
+}
+
+export type ScrapedBlock =
+  | { type: 'paragraph' | 'quote'; text: string }
+  | { type: 'list'; items: string[] }
+  | ({ type: 'image' } & ScrapedImage);
+
+export interface ScrapedSection {
+  heading: string | null;
+  level: number;
+  blocks: ScrapedBlock[];
+}
+
+export interface ScrapedPage {
+  url: string;
+  slug: string;
+  title: string;
+  description: string;
+  headings: { level: number; text: string }[];
+  sections: ScrapedSection[];
+  images: ScrapedImage[];
+  structured_data: unknown[];
+  scraped_at: string | null;
+  source_hash: string;
+}
+
+// Returns null when the bundle does not exist so pages can fall back to hand-written copy
+export function getScrapedPage(slug: string): ScrapedPage | null {
+  const bundlePath = path.join(CONTENT_DIR, `${slug}.json`);
+  if (!fs.existsSync(bundlePath)) {
+    return null;
+  }
+  return JSON.parse(fs.readFileSync(bundlePath, 'utf-8')) as ScrapedPage;
+}
+
+export function getAllScrapedPages(): ScrapedPage[] {
+  if (!fs.existsSync(CONTENT_DIR)) {
+    return [];
+  }
+  return fs
+    .readdirSync(CONTENT_DIR)
+    .filter((file) => file.endsWith('.json') && file !== MANIFEST_FILENAME)
+    .map((file) => getScrapedPage(path.basename(file, '.json')))
+    .filter((page): page is ScrapedPage => page !== null);
+}
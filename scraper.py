@@ -16,6 +16,8 @@ from typing import Set, Dict, List, Optional
 import logging
 from datetime import datetime
 
+from website_scraper import ProgressReporter, setup_logging
+
 # Try to import selenium for JavaScript-rendered content
 try:
     from selenium import webdriver
@@ -29,15 +31,6 @@ except ImportError:
     SELENIUM_AVAILABLE = False
     print("Warning: Selenium not available. Install with: pip install selenium")
 
-# Setup logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
 
 
@@ -133,7 +126,7 @@ class WebsiteScraper:
         """Fetch page content, optionally using Selenium for JS rendering"""
         if use_selenium and self.driver:
             try:
-                logger.info(f"Fetching with Selenium: {url}")
+                logger.debug("Fetching with Selenium: %s", url)
                 self.driver.get(url)
                 
                 # Wait for page to load
@@ -162,7 +155,7 @@ class WebsiteScraper:
                 return None
         
         try:
-            logger.info(f"Fetching: {url}")
+            logger.debug("Fetching: %s", url)
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             time.sleep(self.request_delay)  # Rate limiting
@@ -213,7 +206,7 @@ class WebsiteScraper:
                 self.assets_downloaded.add(url)
                 return str(filepath.relative_to(self.output_dir))
             
-            logger.info(f"Downloading asset: {url}")
+            logger.debug("Downloading asset: %s", url)
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
@@ -469,7 +462,7 @@ class WebsiteScraper:
         
         self.pages_data.append(page_data)
         
-        logger.info(f"Saved page: {filename}")
+        logger.debug("Saved page: %s", filename)
     
     def scrape_page(self, url: str, use_selenium: bool = False):
         """Scrape a single page"""
@@ -523,6 +516,7 @@ class WebsiteScraper:
                 logger.warning("Wix site detected but Selenium not available - content may be incomplete")
         
         to_visit = {self.base_url}
+        progress = ProgressReporter(max_pages)
         
         while to_visit and len(self.visited_urls) < max_pages:
             current_url = to_visit.pop()
@@ -538,7 +532,7 @@ class WebsiteScraper:
                     if link not in self.visited_urls:
                         to_visit.add(link)
             
-            logger.info(f"Progress: {len(self.visited_urls)} pages scraped, {len(to_visit)} in queue, {len(self.assets_downloaded)} assets downloaded")
+            progress.update(len(self.visited_urls), len(to_visit), len(self.assets_downloaded))
         
         # Save summary
         self._save_summary()
@@ -584,6 +578,7 @@ def main():
     base_url = "https://discover-nocode.com"
     output_dir = "scraped_content"
     
+    setup_logging()
     scraper = WebsiteScraper(base_url, output_dir)
     
     # Force Selenium for Wix sites (they're SPAs)
@@ -0,0 +1,128 @@
+"""Local file naming for assets and pages crawled from a local server"""
+
+import http.server
+import json
+import sys
+import threading
+from pathlib import Path
+from urllib.parse import urlparse
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+SITE = {
+    '/': ('text/html', b'<html><body><a href="/blog/post">one</a> <a href="/x/post">two</a></body></html>'),
+    '/blog/post': ('text/html', b'<html><head><link rel="stylesheet" href="/a/style.css"></head>'
+                                b'<body><img src="/a/logo.png"></body></html>'),
+    '/x/post': ('text/html', b'<html><head><link rel="stylesheet" href="/b/style.css"></head>'
+                             b'<body><img src="/b/logo.png"></body></html>'),
+    '/a/style.css': ('text/css', b'body { background: url(img1.png) }'),
+    '/b/style.css': ('text/css', b'body { background: url(img2.png) }'),
+    '/a/logo.png': ('image/png', b'logo-a'),
+    '/b/logo.png': ('image/png', b'logo-b'),
+    '/a/img1.png': ('image/png', b'img1'),
+    '/b/img2.png': ('image/png', b'img2'),
+}
+REQUESTS = []
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        REQUESTS.append(self.path)
+        if self.path not in SITE:
+            self.send_error(404)
+            return
+        content_type, body = SITE[self.path]
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def base_url():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def crawl(base_url, output_dir):
+    scraper = ws.WebsiteScraper(base_url, str(output_dir), request_delay=0, search_index=False)
+    scraper.scrape_all(max_pages=10, use_selenium=False, auto_detect_js=False)
+    return scraper
+
+
+def test_same_basename_gets_distinct_files(base_url, tmp_path):
+    output_dir = tmp_path / "out"
+    scraper = crawl(base_url, output_dir)
+
+    index = scraper.asset_index
+    for name in ('logo.png', 'style.css'):
+        first, second = index[f"{base_url}/a/{name}"]['path'], index[f"{base_url}/b/{name}"]['path']
+        assert first != second
+    assert (output_dir / index[f"{base_url}/a/logo.png"]['path']).read_bytes() == b'logo-a'
+    assert (output_dir / index[f"{base_url}/b/logo.png"]['path']).read_bytes() == b'logo-b'
+    assert (output_dir / index[f"{base_url}/b/img2.png"]['path']).read_bytes() == b'img2'
+
+    pages = {page['url']: page['filename'] for page in scraper.pages_data}
+    assert pages[f"{base_url}/blog/post"] != pages[f"{base_url}/x/post"]
+    assert (output_dir / "pages" / pages[f"{base_url}/x/post"]).read_bytes() == SITE['/x/post'][1]
+
+
+def test_names_are_stable_across_runs(base_url, tmp_path):
+    output_dir = tmp_path / "out"
+    first = crawl(base_url, output_dir)
+    second = ws.WebsiteScraper(base_url, str(output_dir), request_delay=0, search_index=False)
+    second.load_previous_crawl()
+    page = second._save_page(f"{base_url}/x/post", SITE['/x/post'][1],
+                             ws.BeautifulSoup(SITE['/x/post'][1], 'html.parser'))
+
+    assert page['filename'] == next(p['filename'] for p in first.pages_data if p['url'].endswith('/x/post'))
+
+
+def test_mirror_links_each_page_to_its_own_image(base_url, tmp_path):
+    output_dir = tmp_path / "out"
+    crawl(base_url, output_dir)
+    ws.build_offline_mirror(str(output_dir), workers=1)
+
+    summary = json.loads((output_dir / "scraping_summary.json").read_text(encoding='utf-8'))
+    mirror = output_dir / ws.MIRROR_DIR
+    images = {}
+    for page in summary['pages']:
+        soup = ws.BeautifulSoup((mirror / page['filename']).read_text(encoding='utf-8'), 'html.parser')
+        for img in soup.find_all('img'):
+            images[urlparse(page['url']).path] = (mirror / img['src']).resolve().read_bytes()
+    assert images == {'/blog/post': b'logo-a', '/x/post': b'logo-b'}
+
+
+def test_file_left_by_another_url_is_not_reused(base_url, tmp_path):
+    output_dir = tmp_path / "out"
+    stale = output_dir / "assets" / "css" / "style.css"
+    stale.parent.mkdir(parents=True)
+    stale.write_bytes(b'body { background: url(ghost.png) }')
+    scraper = crawl(base_url, output_dir)
+
+    for path in ('/a/style.css', '/b/style.css'):
+        assert (output_dir / scraper.asset_index[base_url + path]['path']).read_bytes() == SITE[path][1]
+    assert not any(url.endswith('ghost.png') for url in scraper.assets_downloaded)
+
+
+def test_assets_saved_by_an_earlier_run_are_reused(base_url, tmp_path):
+    output_dir = tmp_path / "out"
+    crawl(base_url, output_dir)
+    REQUESTS.clear()
+    scraper = crawl(base_url, output_dir)
+
+    assert not [path for path in REQUESTS if path.startswith(('/a/', '/b/'))]
+    # Stylesheets picked up from disk are still scanned against their own URL
+    assert f"{base_url}/b/img2.png" in scraper.asset_index
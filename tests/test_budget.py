@@ -0,0 +1,71 @@
+"""Crawl budget limits and the order work is dropped in"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+def test_optional_work_is_dropped_first():
+    budget = ws.CrawlBudget(max_bytes=1000)
+    budget.charge('https://example.com/', 550)
+
+    # Past the render cutoff (0.5) but not the image one (0.6)
+    assert not budget.allows('videos')
+    assert not budget.allows('render')
+    assert budget.allows('images')
+    assert budget.allows('css')
+    assert budget.allows('page')
+
+    budget.charge('https://example.com/', 300)
+    assert not budget.allows('images')
+    assert not budget.allows('fonts', 'https://example.com/a.woff')
+    assert budget.allows('css')
+    assert budget.skipped == {'pages': 0, 'renders': 1, 'assets': 3}
+
+
+def test_unknown_asset_types_use_the_other_cutoff():
+    budget = ws.CrawlBudget(max_bytes=100)
+    budget.charge('https://example.com/', 76)
+    assert not budget.allows('documents')
+    assert budget.allows('fonts')
+
+
+def test_global_limit_stops_pages():
+    budget = ws.CrawlBudget(max_bytes=100)
+    assert budget.exhausted() is None
+    budget.charge('https://example.com/', 100)
+    assert budget.exhausted() == 'bytes'
+    assert not budget.allows('page')
+    assert budget.pressure() == 1.0
+
+
+def test_host_limit_only_applies_to_that_host():
+    budget = ws.CrawlBudget(max_host_bytes=100)
+    budget.charge('https://cdn.example.net/a.jpg', 90)
+
+    assert not budget.allows('images', 'https://cdn.example.net/b.jpg')
+    assert budget.allows('images', 'https://example.com/b.jpg')
+    assert budget.exhausted() is None
+
+
+def test_time_limit(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ws.time, 'monotonic', lambda: now[0])
+    budget = ws.CrawlBudget(max_seconds=60)
+    budget.start()
+
+    now[0] += 30
+    assert not budget.allows('render')
+    assert budget.allows('images')
+    now[0] += 30
+    assert budget.exhausted() == 'time'
+
+
+def test_no_limits_allow_everything():
+    budget = ws.CrawlBudget()
+    budget.charge('https://example.com/', 10 ** 9)
+    assert budget.allows('videos')
+    assert budget.exhausted() is None
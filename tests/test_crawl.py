@@ -0,0 +1,53 @@
+"""How a crawl finishes"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+def make_scraper(tmp_path, monkeypatch, page_error):
+    scraper = ws.WebsiteScraper('https://example.com', str(tmp_path / "out"), request_delay=0,
+                                search_index=False, check_links=True)
+    calls = []
+
+    def scrape_page_record(url, use_selenium=False):
+        raise page_error
+
+    monkeypatch.setattr(scraper, '_scrape_page_record', scrape_page_record)
+    monkeypatch.setattr(scraper, '_check_links', lambda: calls.append('check_links'))
+    monkeypatch.setattr(scraper, '_save_summary', lambda: calls.append('summary'))
+    return scraper, calls
+
+
+def test_interrupted_crawl_skips_the_link_check(tmp_path, monkeypatch):
+    scraper, calls = make_scraper(tmp_path, monkeypatch, KeyboardInterrupt())
+    with pytest.raises(KeyboardInterrupt):
+        scraper.scrape_all(auto_detect_js=False)
+    assert calls == ['summary']
+
+
+def test_failed_crawl_finishes_once(tmp_path, monkeypatch):
+    scraper, calls = make_scraper(tmp_path, monkeypatch, RuntimeError("boom"))
+    with pytest.raises(RuntimeError):
+        scraper.scrape_all(auto_detect_js=False)
+    assert calls == ['check_links', 'summary']
+
+
+def test_main_writes_the_summary_once_when_interrupted(tmp_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(ws, 'setup_logging', lambda *args: ws.logger)
+    monkeypatch.setattr(ws.WebsiteScraper, '_detect_site', lambda self, use_selenium: use_selenium)
+    monkeypatch.setattr(ws.WebsiteScraper, '_scrape_page_record',
+                        lambda self, url, use_selenium=False: (_ for _ in ()).throw(KeyboardInterrupt()))
+    monkeypatch.setattr(ws.WebsiteScraper, '_check_links', lambda self: calls.append('check_links'))
+    monkeypatch.setattr(ws.WebsiteScraper, '_save_summary', lambda self: calls.append('summary'))
+    monkeypatch.setattr(sys, 'argv', ['website_scraper.py', '--url', 'https://example.com',
+                                      '--output', str(tmp_path / "out"), '--no-selenium', '--check-links',
+                                      '--delay', '0'])
+    ws.main()
+    assert calls == ['summary']
@@ -0,0 +1,46 @@
+"""Stylesheet reference tokenizer"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+def refs(css):
+    return list(ws.iter_css_references(css))
+
+
+def test_imports_and_urls_in_every_quoting_style():
+    css = """
+        @import "base.css";
+        @import url('print.css') print;
+        @IMPORT url(theme.css);
+        .a { background: url(img/a.png) }
+        .b { background: url( "img/b.png" ) }
+        .c { background: URL('img/c.png') }
+    """
+    assert refs(css) == [
+        ('import', 'base.css'), ('import', 'print.css'), ('import', 'theme.css'),
+        ('url', 'img/a.png'), ('url', 'img/b.png'), ('url', 'img/c.png'),
+    ]
+
+
+def test_comments_and_strings_are_not_references():
+    css = """
+        /* .old { background: url(old.png) } @import "old.css"; */
+        .a::before { content: "url(fake.png)" }
+        .b { background: url(real.png) }
+    """
+    assert refs(css) == [('url', 'real.png')]
+
+
+def test_inline_and_fragment_references_are_skipped():
+    css = ".a { background: url(data:image/png;base64,AAAA) } .b { fill: url(#grad) } .c { mask: url() }"
+    assert refs(css) == []
+
+
+def test_font_face_sources():
+    css = "@font-face { src: url(f.woff2) format('woff2'), url('f.woff') format('woff') }"
+    assert refs(css) == [('url', 'f.woff2'), ('url', 'f.woff')]
@@ -0,0 +1,39 @@
+"""Page encoding detection"""
+
+import codecs
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+def test_byte_order_marks():
+    assert ws.detect_html_encoding(codecs.BOM_UTF8 + b'<p>hi</p>', 'text/html; charset=iso-8859-2') == 'utf-8'
+    assert ws.detect_html_encoding(codecs.BOM_UTF16_LE + '<p>hi</p>'.encode('utf-16-le')) == 'utf-16'
+
+
+def test_http_charset_wins_over_meta():
+    body = b'<meta charset="shift_jis"><p>hi</p>'
+    assert ws.detect_html_encoding(body, 'text/html; charset=ISO-8859-2') == 'iso8859-2'
+    assert ws.detect_html_encoding(body, 'text/html') == 'shift_jis'
+
+
+def test_latin1_labels_mean_windows_1252():
+    assert ws.detect_html_encoding(b'<p>hi</p>', 'text/html; charset=iso-8859-1') == 'cp1252'
+    assert ws.detect_html_encoding(b'<meta http-equiv="Content-Type" content="text/html; charset=us-ascii">') == 'cp1252'
+
+
+def test_unknown_labels_are_ignored():
+    assert ws.detect_html_encoding('<p>café</p>'.encode('utf-8'), 'text/html; charset=bogus') == 'utf-8'
+
+
+def test_undeclared_bodies():
+    assert ws.detect_html_encoding('<p>café</p>'.encode('utf-8')) == 'utf-8'
+    assert ws.detect_html_encoding('<p>café</p>'.encode('cp1252')) == 'cp1252'
+
+
+def test_body_ending_mid_sequence_is_not_utf8():
+    assert ws.detect_html_encoding(b'caf\xe9') == 'cp1252'
+    assert ws.detect_html_encoding(b'caf\xc3') == 'cp1252'
@@ -0,0 +1,47 @@
+"""Squarespace fast path"""
+
+import json
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+HTML = b'<html><body><p>Hello</p></body></html>'
+
+
+def make_scraper(tmp_path, monkeypatch, json_body):
+    scraper = ws.WebsiteScraper('https://example.com', str(tmp_path / "out"), request_delay=0.5,
+                                save_to_disk=False, search_index=False)
+    events = []
+
+    def fetch(url, timeout, session=None):
+        events.append(('fetch', url))
+        body = json_body if 'format=json' in url else HTML
+        return types.SimpleNamespace(content=body, headers={'Content-Type': 'text/html'},
+                                     raise_for_status=lambda: None)
+
+    monkeypatch.setattr(scraper, '_fetch', fetch)
+    monkeypatch.setattr(ws.time, 'sleep', lambda seconds: events.append(('sleep', seconds)))
+    return scraper, events
+
+
+def test_both_requests_are_followed_by_the_delay(tmp_path, monkeypatch):
+    scraper, events = make_scraper(tmp_path, monkeypatch, json.dumps({'mainContent': '<p>More</p>'}).encode())
+    html, encoding, supplement = scraper._fetch_squarespace_page('https://example.com/about')
+
+    assert html == HTML
+    assert supplement is not None and 'More' in supplement.get_text()
+    assert events == [('fetch', 'https://example.com/about'), ('sleep', 0.5),
+                      ('fetch', 'https://example.com/about?format=json'), ('sleep', 0.5)]
+
+
+def test_prefetched_html_only_waits_after_the_json(tmp_path, monkeypatch):
+    scraper, events = make_scraper(tmp_path, monkeypatch, b'not json')
+    html, encoding, supplement = scraper._fetch_squarespace_page('https://example.com/', prefetched=(HTML, 'utf-8'))
+
+    assert (html, supplement) == (HTML, None)
+    assert events == [('fetch', 'https://example.com/?format=json'), ('sleep', 0.5)]
+    assert scraper.platform_pages['fallback'] == 1
@@ -0,0 +1,69 @@
+"""Render watchdog against a stand-in WebDriver whose page load hangs"""
+
+import sys
+import threading
+import time
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+class HungDriver:
+    """get() blocks until the session is quit, then fails like a dead session"""
+
+    def __init__(self, shutdown_seconds: float = 0.3):
+        self.quit_called = threading.Event()
+        self.shutdown_seconds = shutdown_seconds
+        self.service = types.SimpleNamespace(process=None, stop=lambda: None)
+
+    def get(self, url):
+        self.quit_called.wait(5)
+        raise ConnectionError("session deleted because of page crash")
+
+    def quit(self):
+        self.quit_called.set()
+        # Still shutting down when get() fails
+        time.sleep(self.shutdown_seconds)
+
+
+def make_scraper(tmp_path, monkeypatch):
+    monkeypatch.setattr(ws, 'RENDER_WATCHDOG_GRACE', 0.0)
+    monkeypatch.setattr(ws, 'RENDER_QUIT_TIMEOUT', 2.0)
+    monkeypatch.setattr(ws, 'TimeoutException', type('TimeoutException', (Exception,), {}))
+    scraper = ws.WebsiteScraper('http://127.0.0.1:1', str(tmp_path / "out"), request_delay=0, save_to_disk=False,
+                                search_index=False, render_cache=False, page_timeout=0.1)
+    return scraper
+
+
+def test_hung_render_drops_the_killed_session(tmp_path, monkeypatch):
+    scraper = make_scraper(tmp_path, monkeypatch)
+    driver = HungDriver()
+    scraper.driver = driver
+
+    body, encoding = scraper._get_page_content('http://127.0.0.1:1/slow', use_selenium=True)
+
+    assert body is None
+    assert driver.quit_called.is_set()
+    assert scraper.driver is None
+    assert scraper.latency.hung_renders == 1
+
+
+def test_render_that_finishes_keeps_its_session(tmp_path, monkeypatch):
+    scraper = make_scraper(tmp_path, monkeypatch)
+    monkeypatch.setattr(ws.time, 'sleep', lambda seconds: None)
+    monkeypatch.setattr(ws, 'WebDriverWait', lambda driver, timeout: types.SimpleNamespace(until=lambda cond: True))
+    monkeypatch.setattr(ws, 'EC', types.SimpleNamespace(presence_of_element_located=lambda locator: None))
+    monkeypatch.setattr(ws, 'By', types.SimpleNamespace(TAG_NAME='tag name'))
+    driver = types.SimpleNamespace(get=lambda url: None, execute_script=lambda script: None,
+                                   page_source='<html><body>ok</body></html>', quit=lambda: None)
+    scraper.page_timeout = 5.0
+    scraper.driver = driver
+
+    body, encoding = scraper._get_page_content('http://127.0.0.1:1/', use_selenium=True)
+
+    assert body == b'<html><body>ok</body></html>'
+    assert scraper.driver is driver
+    assert scraper.latency.hung_renders == 0
@@ -0,0 +1,45 @@
+"""Reprocessing saved pages without network"""
+
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+PAGE = b'''<html><body>
+<img src="/logo.png">
+<img src="https://images.squarespace-cdn.com/hero.jpg">
+<img src="https://cdn.partner.net/badge.png">
+<img src="https://tracker.example.net/pixel.gif">
+</body></html>'''
+
+
+def saved_crawl(tmp_path):
+    output_dir = tmp_path / "out"
+    (output_dir / "pages").mkdir(parents=True)
+    (output_dir / "pages" / "index.html").write_bytes(PAGE)
+    summary = {'base_url': 'https://example.com',
+               'pages': [{'url': 'https://example.com', 'filename': 'index.html', 'encoding': 'utf-8'}]}
+    (output_dir / "scraping_summary.json").write_text(json.dumps(summary), encoding='utf-8')
+    return output_dir
+
+
+def queued(output_dir):
+    return {entry['url'] for entry in json.loads((output_dir / ws.ASSET_QUEUE_FILENAME).read_text(encoding='utf-8'))}
+
+
+def test_asset_queue_uses_the_crawl_host_policy(tmp_path):
+    output_dir = saved_crawl(tmp_path)
+    ws.reprocess_saved_pages(str(output_dir), workers=1, search_index=False)
+
+    assert queued(output_dir) == {'https://example.com/logo.png', 'https://images.squarespace-cdn.com/hero.jpg'}
+
+
+def test_extra_asset_hosts_are_queued(tmp_path):
+    output_dir = saved_crawl(tmp_path)
+    ws.reprocess_saved_pages(str(output_dir), workers=1, search_index=False, asset_hosts=['cdn.partner.net'])
+
+    assert 'https://cdn.partner.net/badge.png' in queued(output_dir)
+    assert 'https://tracker.example.net/pixel.gif' not in queued(output_dir)
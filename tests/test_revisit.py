@@ -0,0 +1,39 @@
+"""Change-rate estimate used by the revisit scheduler"""
+
+import math
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+DAY = 86400
+
+
+def test_pages_without_history_use_the_default_rate():
+    assert ws.estimate_change_rate(0, 0, 0) == ws.DEFAULT_CHANGE_RATE
+    assert ws.estimate_change_rate(3, 1, 0) == ws.DEFAULT_CHANGE_RATE
+
+
+def test_bias_reduced_estimate():
+    # 10 daily checks, 5 changes: -ln(5.5 / 10.5) per day
+    rate = ws.estimate_change_rate(10, 5, 10 * DAY)
+    assert math.isclose(rate, -math.log(5.5 / 10.5) / DAY)
+
+
+def test_estimate_exceeds_the_naive_ratio():
+    # Changes seen at every visit may hide several changes per interval
+    assert ws.estimate_change_rate(10, 10, 10 * DAY) > 10 / (10 * DAY)
+
+
+def test_unchanged_pages_slow_down_with_evidence():
+    short = ws.estimate_change_rate(2, 0, 2 * DAY)
+    long = ws.estimate_change_rate(20, 0, 20 * DAY)
+    assert long < short
+    assert long == 0.5 / (20 * DAY)
+
+
+def test_more_changes_mean_a_higher_rate():
+    rates = [ws.estimate_change_rate(10, changes, 10 * DAY) for changes in range(11)]
+    assert rates == sorted(rates)
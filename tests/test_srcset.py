@@ -0,0 +1,65 @@
+"""srcset parsing and variant selection"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+WIDTHS = [('s.jpg', 480.0, 'w'), ('m.jpg', 960.0, 'w'), ('l.jpg', 1600.0, 'w')]
+
+
+def test_width_and_density_descriptors():
+    assert ws.parse_srcset('s.jpg 480w, m.jpg 960w,l.jpg 1600w') == WIDTHS
+    assert ws.parse_srcset('a.png, b.png 2x') == [('a.png', 1.0, 'x'), ('b.png', 2.0, 'x')]
+
+
+def test_urls_containing_commas():
+    srcset = ('https://static.wixstatic.com/media/a.jpg/v1/fill/w_300,h_200/a.jpg 1x, '
+              'https://static.wixstatic.com/media/a.jpg/v1/fill/w_600,h_400/a.jpg 2x')
+    assert [url for url, _, _ in ws.parse_srcset(srcset)] == [
+        'https://static.wixstatic.com/media/a.jpg/v1/fill/w_300,h_200/a.jpg',
+        'https://static.wixstatic.com/media/a.jpg/v1/fill/w_600,h_400/a.jpg',
+    ]
+
+
+def test_stray_separators_and_bad_descriptors():
+    assert ws.parse_srcset(' , a.png 2x,, b.png bogus , ') == [('a.png', 2.0, 'x'), ('b.png', 1.0, 'x')]
+    assert ws.parse_srcset('') == []
+
+
+@pytest.mark.parametrize('policy, expected', [
+    ('largest', ['l.jpg']),
+    ('smallest', ['s.jpg']),
+    ('all', ['s.jpg', 'm.jpg', 'l.jpg']),
+    ('800', ['m.jpg']),
+    ('2000', ['l.jpg']),
+])
+def test_policies(policy, expected):
+    assert ws.select_srcset_candidates(WIDTHS, policy) == expected
+
+
+def test_sizes_policy_uses_the_matching_slot():
+    sizes = '(max-width: 600px) 100vw, 50vw'
+    # 1920px viewport: the slot is 960px wide
+    assert ws.select_srcset_candidates(WIDTHS, 'sizes', sizes) == ['m.jpg']
+    assert ws.select_srcset_candidates(WIDTHS, 'sizes', sizes, viewport_width=500) == ['m.jpg']
+    assert ws.select_srcset_candidates(WIDTHS, 'sizes', '400px') == ['s.jpg']
+
+
+def test_density_candidates_prefer_1x():
+    candidates = ws.parse_srcset('a.png 0.5x, b.png 1x, c.png 2x')
+    assert ws.select_srcset_candidates(candidates, '800') == ['b.png']
+
+
+def test_round_trip():
+    assert ws.parse_srcset(ws.format_srcset(WIDTHS)) == WIDTHS
+
+
+def test_policy_validation():
+    assert ws.validate_srcset_policy('640') == '640'
+    with pytest.raises(ValueError):
+        ws.validate_srcset_policy('biggest')
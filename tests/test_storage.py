@@ -0,0 +1,121 @@
+"""S3Storage against an in-memory stand-in for the boto3 S3 client"""
+
+import io
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+pytest.importorskip('boto3')
+
+from website_scraper import S3Storage, STORAGE_MANIFEST_KEY  # noqa: E402
+
+
+class FakeS3:
+    """The S3 client calls S3Storage makes, recorded and kept in memory"""
+    
+    class exceptions:
+        class NoSuchKey(Exception):
+            pass
+    
+    def __init__(self, fail_keys=()):
+        self.objects = {}
+        self.calls = []
+        self.fail_keys = set(fail_keys)
+        self._lock = threading.Lock()
+    
+    def _store(self, call, key, data):
+        with self._lock:
+            self.calls.append((call, key))
+            if key in self.fail_keys:
+                raise OSError(f"refusing {key}")
+            self.objects[key] = data
+    
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self.exceptions.NoSuchKey(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+    
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self._store('put', Key, Body)
+    
+    def upload_fileobj(self, fileobj, bucket, key, ExtraArgs=None, Config=None):
+        self._store('upload_fileobj', key, fileobj.read())
+    
+    def upload_file(self, filename, bucket, key, ExtraArgs=None, Config=None):
+        self._store('upload_file', key, Path(filename).read_bytes())
+    
+    def copy_object(self, Bucket, Key, CopySource):
+        self._store('copy', Key, self.objects[CopySource['Key']])
+    
+    def object_calls(self):
+        return [call for call in self.calls if not call[1].endswith(STORAGE_MANIFEST_KEY)]
+
+
+def open_s3(tmp_path, client, **options):
+    return S3Storage(tmp_path / "out", 's3://bucket/site', client=client, concurrency=4, **options)
+
+
+def test_duplicates_in_one_run_are_uploaded_once(tmp_path):
+    client = FakeS3()
+    storage = open_s3(tmp_path, client)
+    storage.put('assets/a.css', b'body{}')
+    storage.put('assets/b.css', b'body{}')
+    storage.put('assets/c.css', b'p{}')
+    storage.close()
+    
+    assert sorted(client.object_calls()) == [
+        ('copy', 'site/assets/b.css'), ('put', 'site/assets/a.css'), ('put', 'site/assets/c.css'),
+    ]
+    assert client.objects['site/assets/b.css'] == b'body{}'
+    assert storage.counts['uploaded'] == 2
+    assert storage.counts['copied'] == 1
+    assert (tmp_path / "out" / "assets" / "b.css").read_bytes() == b'body{}'
+
+
+def test_unchanged_objects_are_skipped_on_the_next_run(tmp_path):
+    client = FakeS3()
+    storage = open_s3(tmp_path, client)
+    storage.put('pages/index.html', b'<html></html>')
+    storage.close()
+    
+    client.calls.clear()
+    storage = open_s3(tmp_path, client)
+    storage.put('pages/index.html', b'<html></html>')
+    storage.put('pages/copy.html', b'<html></html>')
+    storage.close()
+    
+    assert client.object_calls() == [('copy', 'site/pages/copy.html')]
+    assert storage.counts['skipped'] == 1
+
+
+def test_large_files_are_streamed_from_disk(tmp_path):
+    client = FakeS3()
+    storage = open_s3(tmp_path, client, multipart_threshold=64)
+    video = tmp_path / "clip.mp4"
+    video.write_bytes(b'x' * 1000)
+    storage.put_file('assets/videos/clip.mp4', video)
+    storage.put('assets/videos/again.mp4', b'x' * 1000)
+    storage.close()
+    
+    assert sorted(client.object_calls()) == [
+        ('copy', 'site/assets/videos/again.mp4'), ('upload_file', 'site/assets/videos/clip.mp4'),
+    ]
+    assert storage.counts['multipart'] == 1
+    assert storage.counts['bytes'] == 1000
+
+
+def test_duplicates_of_a_failed_upload_are_uploaded_themselves(tmp_path):
+    client = FakeS3(fail_keys={'site/assets/a.js'})
+    storage = open_s3(tmp_path, client)
+    storage.put('assets/a.js', b'go()')
+    storage.put('assets/b.js', b'go()')
+    storage.close()
+    
+    assert client.object_calls() == [('put', 'site/assets/a.js'), ('put', 'site/assets/b.js')]
+    assert client.objects['site/assets/b.js'] == b'go()'
+    assert 'assets/a.js' not in storage.manifest
+    assert storage.counts['failed'] == 1
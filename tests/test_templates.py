@@ -0,0 +1,60 @@
+"""Site template (boilerplate) detection"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+NAV = ('nav', 'Home About Contact')
+FOOTER = ('footer', '(c) Example')
+
+
+def page(n):
+    return [NAV, (f'body-{n}', f'Article {n}'), FOOTER]
+
+
+def test_blocks_on_most_pages_are_boilerplate():
+    templates = ws.TemplateDetector(min_pages=3, min_share=0.5)
+    for n in range(4):
+        templates.add_page(f'https://example.com/{n}', page(n))
+
+    text, boilerplate = templates.split(page(9))
+    assert text == 'Article 9'
+    assert boilerplate == ['nav', 'footer']
+    assert templates.boilerplate() == {
+        'nav': {'text': 'Home About Contact', 'pages': 4},
+        'footer': {'text': '(c) Example', 'pages': 4},
+    }
+
+
+def test_blocks_need_min_pages_and_min_share():
+    templates = ws.TemplateDetector(min_pages=3, min_share=0.5)
+    for n in range(2):
+        templates.add_page(f'https://example.com/{n}', page(n))
+    assert not templates.is_boilerplate('nav')
+
+    for n in range(2, 8):
+        templates.add_page(f'https://example.com/{n}', [(f'body-{n}', f'Article {n}')])
+    # On 2 of 8 pages: below both thresholds
+    assert not templates.is_boilerplate('nav')
+
+
+def test_a_url_saved_again_is_counted_once():
+    templates = ws.TemplateDetector(min_pages=3, min_share=0.5)
+    for _ in range(5):
+        templates.add_page('https://example.com/', page(0))
+
+    assert templates.pages == 1
+    assert not templates.is_boilerplate('nav')
+
+
+def test_revisited_pages_do_not_inflate_the_page_count(tmp_path):
+    scraper = ws.WebsiteScraper('https://example.com', str(tmp_path / "out"), request_delay=0,
+                                save_to_disk=False, search_index=False)
+    html = b'<html><body><nav>Home</nav><p>Hello</p></body></html>'
+    for _ in range(3):
+        scraper._save_page('https://example.com/', html, ws.BeautifulSoup(html, 'html.parser'))
+
+    assert scraper.templates.pages == 1
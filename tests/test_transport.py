@@ -0,0 +1,64 @@
+"""Connection reuse accounting against local servers"""
+
+import http.server
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import website_scraper as ws  # noqa: E402
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = b'<html><body>ok</body></html>'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(params=['HTTP/1.0', 'HTTP/1.1'])
+def server(request):
+    handler = type('VersionedHandler', (Handler,), {'protocol_version': request.param})
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield request.param, f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_reconnects_count_as_connections(server, tmp_path):
+    version, base_url = server
+    scraper = ws.WebsiteScraper(base_url, str(tmp_path / "out"), request_delay=0, save_to_disk=False,
+                                search_index=False)
+    for _ in range(5):
+        scraper._fetch(base_url + '/', 10, session=scraper.session)
+
+    stats = scraper._transport_stats()
+    assert stats['requests'] == 5
+    if version == 'HTTP/1.0':
+        # The server closes every connection, so nothing is reused
+        assert stats['connections'] == 5
+        assert stats['reuse_ratio'] == 0.0
+    else:
+        assert stats['connections'] == 1
+        assert stats['reuse_ratio'] == 0.8
+
+
+def test_dns_cache_is_off_by_default(tmp_path):
+    getaddrinfo = ws.socket.getaddrinfo
+    scraper = ws.WebsiteScraper('http://127.0.0.1', str(tmp_path / "out"), request_delay=0, save_to_disk=False,
+                                search_index=False)
+
+    assert scraper.dns_cache is None
+    assert ws.socket.getaddrinfo is getaddrinfo
+    assert scraper._transport_stats()['dns'] is None
@@ -20,43 +20,2150 @@ Requirements:
 
 import os
 import re
+import sys
 import json
+import math
+import mmap
 import time
+import fnmatch
+import hashlib
+import importlib.util
+import io
+import socket
+import sqlite3
+import ssl
+import threading
+import tracemalloc
 import argparse
+import atexit
+import codecs
+import copy
+import shutil
+import signal
+import subprocess
+import tempfile
+import multiprocessing
+import queue
+import zipfile
 import requests
+import urllib3
+from array import array
+from collections import deque
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from requests.adapters import HTTPAdapter
 from urllib.parse import urljoin, urlparse, urlunparse
 from pathlib import Path
-from bs4 import BeautifulSoup
-from typing import Set, Dict, List, Optional
+from bs4 import BeautifulSoup, CData, NavigableString
+from typing import Set, Dict, List, Optional, Iterator, AsyncIterator, Tuple
 import logging
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 
-# Try to import selenium for JavaScript-rendered content
-try:
-    from selenium import webdriver
-    from selenium.webdriver.chrome.options import Options
-    from selenium.webdriver.common.by import By
-    from selenium.webdriver.support.ui import WebDriverWait
-    from selenium.webdriver.support import expected_conditions as EC
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
-    print("Warning: Selenium not available. Install with: pip install selenium")
-    print("Note: JavaScript-rendered content may not be fully scraped without Selenium.")
+# Selenium (JavaScript rendering) and Pillow (image optimisation) are optional
+# and slow to import, so only check they are installed here; they are
+# imported on first use.
+SELENIUM_AVAILABLE = importlib.util.find_spec('selenium') is not None
+PIL_AVAILABLE = importlib.util.find_spec('PIL') is not None
+# httpx with h2 enables HTTP/2 (--http2)
+HTTP2_AVAILABLE = importlib.util.find_spec('httpx') is not None and importlib.util.find_spec('h2') is not None
+# boto3 enables S3-compatible output storage (--storage s3://...)
+BOTO3_AVAILABLE = importlib.util.find_spec('boto3') is not None
+
+webdriver = Options = Service = By = WebDriverWait = EC = TimeoutException = None
+
+
+def _import_selenium():
+    """Import the Selenium names used by the scraper into module globals"""
+    global webdriver, Options, Service, By, WebDriverWait, EC, TimeoutException
+    if webdriver is None:
+        from selenium import webdriver
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
 
 
 # Setup logging
-def setup_logging(log_file: str = "scraper.log"):
-    """Configure logging"""
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler(log_file),
-            logging.StreamHandler()
+#
+# Records are handed to a QueueHandler and written by a QueueListener thread,
+# so crawl threads never block on file or terminal I/O. --log-format json
+# writes one JSON object per line, including any `extra=` fields.
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+PROGRESS_INTERVAL = 10.0
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_log_listener: Optional[QueueListener] = None
+_EXC_FORMATTER = logging.Formatter()
+
+
+class JsonLogFormatter(logging.Formatter):
+    """Format records as single-line JSON objects"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class LogQueueHandler(QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener's handlers.
+    
+    The stock prepare() formats the whole record, folding the traceback into
+    the message. Here only the arguments are merged into the message, and
+    the traceback is rendered to exc_text (so no frames are kept alive while
+    the record waits) for the text and JSON formatters to place.
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = record.exc_text or _EXC_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _stop_log_listener():
+    """Flush queued records and stop the listener thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+
+def _log_directly_after_fork():
+    """Forked workers have no listener thread, so give them the real handlers"""
+    global _log_listener
+    if _log_listener is not None:
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, QueueHandler):
+                root.removeHandler(handler)
+        for handler in _log_listener.handlers:
+            root.addHandler(handler)
+        _log_listener = None
+
+
+def setup_logging(log_file: str = "scraper.log", log_format: str = "text", verbose: bool = False):
+    """Configure queue-based logging; per-URL messages are only shown with verbose"""
+    global _log_listener
+    _stop_log_listener()
+    formatter = JsonLogFormatter() if log_format == 'json' else logging.Formatter(LOG_FORMAT)
+    handlers = [logging.FileHandler(log_file), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    queue_handler = LogQueueHandler(log_queue)
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler], force=True)
+    _log_listener = QueueListener(log_queue, *handlers)
+    _log_listener.start()
+    # Verbose shows the scraper's per-URL lines, not urllib3's connection chatter
+    scraper_logger = logging.getLogger(__name__)
+    scraper_logger.setLevel(logging.DEBUG if verbose else logging.NOTSET)
+    return scraper_logger
+
+
+atexit.register(_stop_log_listener)
+os.register_at_fork(after_in_child=_log_directly_after_fork)
+
+
+class ProgressReporter:
+    """
+    Rate-limited crawl progress.
+    
+    update() is called once per page but only logs every `interval` seconds
+    (and on the first page), with throughput and a rough ETA against the
+    page limit. The ETA assumes the current rate holds and the frontier
+    does not run dry first.
+    """
+    
+    def __init__(self, max_pages: int, interval: float = PROGRESS_INTERVAL):
+        self.max_pages = max_pages
+        self.interval = interval
+        self.started = time.monotonic()
+        self.last_report: Optional[float] = None
+    
+    def update(self, pages: int, queued: int, assets: int, force: bool = False):
+        now = time.monotonic()
+        if not force and self.last_report is not None and now - self.last_report < self.interval:
+            return
+        self.last_report = now
+        elapsed = max(now - self.started, 1e-6)
+        rate = pages / elapsed
+        remaining = min(queued, max(self.max_pages - pages, 0))
+        eta = remaining / rate if rate > 0 else None
+        eta_text = f", ETA {_format_duration(eta)}" if eta is not None and remaining else ""
+        logger.info(f"Progress: {pages} pages ({rate:.2f}/s), {queued} in queue, "
+                    f"{assets} assets ({assets / elapsed:.2f}/s){eta_text}",
+                    extra={'event': 'progress', 'pages': pages, 'queued': queued, 'assets': assets,
+                           'pages_per_sec': round(rate, 3), 'eta_seconds': round(eta, 1) if eta is not None else None})
+
+
+def _format_duration(seconds: float) -> str:
+    """Render seconds as e.g. 45s, 12m05s or 3h02m"""
+    seconds = int(seconds)
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+logger = logging.getLogger(__name__)
+
+
+# Extension -> asset directory mapping used for downloaded files
+ASSET_TYPE_EXTENSIONS = {
+    'images': ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico'],
+    'css': ['.css'],
+    'js': ['.js', '.mjs'],
+    'fonts': ['.woff', '.woff2', '.ttf', '.otf', '.eot'],
+    'videos': ['.mp4', '.webm', '.mov', '.avi'],
+}
+
+
+def guess_asset_type(filename: str, default: str = "other") -> str:
+    """Determine asset directory from a filename's extension"""
+    ext = os.path.splitext(filename)[1].lower()
+    for asset_type, extensions in ASSET_TYPE_EXTENSIONS.items():
+        if ext in extensions:
+            return asset_type
+    return default
+
+
+def claim_local_name(name: str, url: str, owners: Dict[str, str]) -> str:
+    """
+    Reserve a local file name for url.
+
+    owners maps names already handed out to the URL holding them. A name held
+    by a different URL (e.g. /a/logo.png vs /b/logo.png) gets a short hash of
+    the full URL appended, so the same URL always gets the same name back.
+    """
+    if owners.setdefault(name, url) == url:
+        return name
+    stem, ext = os.path.splitext(name)
+    name = f"{stem}_{hashlib.sha1(url.encode()).hexdigest()[:8]}{ext}"
+    owners[name] = url
+    return name
+
+
+# Tokens that matter when scanning a stylesheet for dependencies. Comments and
+# plain strings are matched (and skipped) so url()-like text inside them is ignored.
+CSS_TOKEN_RE = re.compile(r"""
+    (?P<comment>/\*.*?\*/)
+  | @import\s+(?:url\(\s*)?(?P<import>"[^"]*"|'[^']*'|[^\s;)]+)
+  | url\(\s*(?P<url>"[^"]*"|'[^']*'|[^)\s]*)\s*\)
+  | (?P<string>"(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')
+""", re.IGNORECASE | re.DOTALL | re.VERBOSE)
+
+
+def iter_css_references(css_text: str) -> Iterator[Tuple[str, str]]:
+    """
+    Tokenize a stylesheet and yield its external references.
+
+    Yields (kind, url) tuples where kind is "import" for @import rules and
+    "url" for url() values. URLs are returned as written (unresolved);
+    data: URIs and fragment-only references are skipped.
+    """
+    for match in CSS_TOKEN_RE.finditer(css_text):
+        kind = match.lastgroup
+        if kind not in ('import', 'url'):
+            continue
+        ref = match.group(kind).strip().strip('"\'').strip()
+        if not ref or ref.startswith(('data:', '#', 'about:', 'javascript:')):
+            continue
+        yield kind, ref
+
+
+# Viewport assumed when evaluating sizes/media (matches the Selenium window size)
+VIEWPORT_WIDTH = 1920
+
+SRCSET_POLICIES = ('largest', 'smallest', 'all', 'sizes')
+
+
+def parse_srcset(srcset: str) -> List[Tuple[str, float, str]]:
+    """
+    Parse a srcset attribute following the HTML candidate-string rules.
+    
+    URLs may contain commas (e.g. Wix "/v1/fill/w_300,h_200/..." paths), so
+    candidates are split on whitespace first rather than on every comma.
+    
+    Returns:
+        List of (url, value, unit) where unit is "w" (width) or "x" (density).
+        Candidates without a descriptor are treated as 1x.
+    """
+    candidates = []
+    pos, length = 0, len(srcset)
+    while pos < length:
+        # Skip separators between candidates
+        while pos < length and (srcset[pos].isspace() or srcset[pos] == ','):
+            pos += 1
+        if pos >= length:
+            break
+        
+        start = pos
+        while pos < length and not srcset[pos].isspace():
+            pos += 1
+        url = srcset[start:pos]
+        
+        descriptor = ''
+        if url.endswith(','):
+            url = url.rstrip(',')
+        else:
+            # Descriptors run until the next comma outside parentheses
+            depth = 0
+            start = pos
+            while pos < length:
+                char = srcset[pos]
+                if char == '(':
+                    depth += 1
+                elif char == ')':
+                    depth = max(depth - 1, 0)
+                elif char == ',' and depth == 0:
+                    break
+                pos += 1
+            descriptor = srcset[start:pos].strip()
+        
+        if not url:
+            continue
+        
+        value, unit = 1.0, 'x'
+        for token in descriptor.split():
+            try:
+                if token[-1] in 'wx':
+                    value, unit = float(token[:-1]), token[-1]
+            except ValueError:
+                pass
+        candidates.append((url, value, unit))
+    return candidates
+
+
+def _css_length_to_px(length: str, viewport_width: int) -> Optional[float]:
+    """Convert a simple CSS length (px, vw, em, rem) to pixels"""
+    match = re.fullmatch(r'\s*([\d.]+)\s*(px|vw|em|rem)\s*', length)
+    if not match:
+        return None
+    value, unit = float(match.group(1)), match.group(2)
+    if unit == 'vw':
+        return value * viewport_width / 100
+    if unit in ('em', 'rem'):
+        return value * 16
+    return value
+
+
+def media_matches(media: Optional[str], viewport_width: int = VIEWPORT_WIDTH) -> bool:
+    """Evaluate min-width/max-width media conditions; anything else is assumed to match"""
+    if not media:
+        return True
+    for feature, length in re.findall(r'\(\s*(min-width|max-width)\s*:\s*([^)]+)\)', media):
+        px = _css_length_to_px(length, viewport_width)
+        if px is None:
+            continue
+        if feature == 'min-width' and viewport_width < px:
+            return False
+        if feature == 'max-width' and viewport_width > px:
+            return False
+    return True
+
+
+def parse_sizes(sizes: Optional[str], viewport_width: int = VIEWPORT_WIDTH) -> float:
+    """Return the image slot width in pixels for a sizes attribute"""
+    if sizes:
+        for entry in sizes.split(','):
+            entry = entry.strip()
+            media, _, length = entry.rpartition(')')
+            if media:
+                media += ')'
+            if media and not media_matches(media, viewport_width):
+                continue
+            px = _css_length_to_px(length or entry, viewport_width)
+            if px is not None:
+                return px
+    return float(viewport_width)
+
+
+def validate_srcset_policy(policy: str) -> str:
+    """Return policy if select_srcset_candidates understands it, else raise ValueError"""
+    if policy not in SRCSET_POLICIES and not policy.isdigit():
+        raise ValueError(f"srcset policy must be one of {', '.join(SRCSET_POLICIES)} or a width in pixels, "
+                         f"got {policy!r}")
+    return policy
+
+
+def select_srcset_candidates(candidates: List[Tuple[str, float, str]], policy: str = 'largest',
+                             sizes: Optional[str] = None,
+                             viewport_width: int = VIEWPORT_WIDTH) -> List[str]:
+    """
+    Choose which srcset variants to download.
+    
+    Args:
+        candidates: Output of parse_srcset
+        policy: "largest", "smallest", "all", "sizes" (the variant a browser at
+            viewport_width would pick for the sizes attribute) or a target
+            width in pixels such as "800"
+        sizes: The element's sizes attribute, used by the "sizes" policy
+    """
+    if not candidates or policy == 'all':
+        return [url for url, _, _ in candidates]
+    
+    if policy == 'largest':
+        return [max(candidates, key=lambda c: c[1])[0]]
+    if policy == 'smallest':
+        return [min(candidates, key=lambda c: c[1])[0]]
+    
+    if policy == 'sizes':
+        target_width = parse_sizes(sizes, viewport_width)
+    else:
+        target_width = float(policy)
+    
+    widths = [c for c in candidates if c[2] == 'w']
+    if widths:
+        large_enough = [c for c in widths if c[1] >= target_width]
+        chosen = min(large_enough, key=lambda c: c[1]) if large_enough else max(widths, key=lambda c: c[1])
+    else:
+        # Density descriptors: pick the 1x variant (or the closest above it)
+        at_least_1x = [c for c in candidates if c[1] >= 1]
+        chosen = min(at_least_1x, key=lambda c: c[1]) if at_least_1x else max(candidates, key=lambda c: c[1])
+    return [chosen[0]]
+
+
+def format_srcset(candidates: List[Tuple[str, float, str]]) -> str:
+    """Serialize parsed srcset candidates back into an attribute value"""
+    return ', '.join(f"{url} {value:g}{unit}" for url, value, unit in candidates)
+
+
+# Asset hosts downloaded by default in addition to the crawled site itself.
+# Plain entries are shell-style globs; entries prefixed with "re:" are regexes.
+DEFAULT_ASSET_HOSTS = [
+    # Wix
+    'static.wixstatic.com',
+    'video.wixstatic.com',
+    '*.parastorage.com',
+    # Squarespace
+    'images.squarespace-cdn.com',
+    'static*.squarespace.com',
+    'assets.squarespace.com',
+    # Shopify
+    'cdn.shopify.com',
+    # Generic image/CDN hosts
+    '*.cloudfront.net',
+    '*.imgix.net',
+]
+
+
+class AssetHostPolicy:
+    """Decide which external hosts assets may be downloaded from"""
+    
+    def __init__(self, patterns: List[str]):
+        self.patterns = list(patterns)
+        self._globs = [p.lower() for p in self.patterns if not p.startswith('re:')]
+        self._regexes = [re.compile(p[3:], re.IGNORECASE) for p in self.patterns if p.startswith('re:')]
+    
+    def allows(self, host: str) -> bool:
+        """Check a hostname (port is ignored) against the configured patterns"""
+        host = host.lower().split(':', 1)[0]
+        return (any(fnmatch.fnmatchcase(host, glob) for glob in self._globs)
+                or any(regex.search(host) for regex in self._regexes))
+    
+    @classmethod
+    def for_site(cls, domain: str, extra_patterns: Optional[List[str]] = None,
+                 site_config: Optional[Dict] = None) -> 'AssetHostPolicy':
+        """
+        Build the policy for a site.
+        
+        site_config maps site domains (globs, www. ignored) to settings:
+            {"example.com": {"asset_hosts": ["cdn.example.net"], "replace_default_hosts": false}}
+        """
+        patterns = list(DEFAULT_ASSET_HOSTS)
+        site = domain.lower().replace('www.', '')
+        for site_pattern, settings in (site_config or {}).items():
+            if fnmatch.fnmatchcase(site, site_pattern.lower().replace('www.', '')):
+                if settings.get('replace_default_hosts'):
+                    patterns = []
+                patterns.extend(settings.get('asset_hosts', []))
+        patterns.extend(extra_patterns or [])
+        return cls(patterns)
+
+
+def resolve_url(url: str, base: str) -> str:
+    """Resolve a possibly relative or scheme-relative (//host/path) URL against base"""
+    url = url.strip()
+    if url.startswith('//'):
+        return f"{urlparse(base).scheme or 'https'}:{url}"
+    return urljoin(base, url)
+
+
+def _iter_structured_data_images(data) -> Iterator[str]:
+    """Yield image/logo URLs from parsed JSON-LD"""
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_structured_data_images(item)
+    elif isinstance(data, dict):
+        for key, value in data.items():
+            if key in ('image', 'logo', 'thumbnailUrl', 'contentUrl'):
+                if isinstance(value, str):
+                    yield value
+                elif isinstance(value, dict) and isinstance(value.get('url'), str):
+                    yield value['url']
+                elif isinstance(value, list):
+                    yield from (v for v in value if isinstance(v, str))
+            if isinstance(value, (dict, list)):
+                yield from _iter_structured_data_images(value)
+
+
+# ---------------------------------------------------------------------------
+# Image optimisation
+# ---------------------------------------------------------------------------
+
+OPTIMIZABLE_IMAGE_EXTENSIONS = ['.jpg', '.jpeg', '.png', '.webp']
+
+IMAGE_SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 50},
+}
+
+
+def optimize_image(output_dir: str, relative_path: str, formats: List[str], widths: List[int]) -> Dict:
+    """
+    Transcode one downloaded image into resized, metadata-free variants.
+    
+    Runs in a worker process. Variants are written next to the original under
+    assets/images/optimized/ as <stem>-<width>.<format>; widths larger than the
+    original are skipped and the original width is always included.
+    
+    Returns:
+        Dict with the original 'width'/'height' and a list of 'variants'
+    """
+    from PIL import Image, features as pil_features
+    
+    output_path = Path(output_dir)
+    source = output_path / relative_path
+    optimized_dir = source.parent / "optimized"
+    optimized_dir.mkdir(exist_ok=True)
+    
+    source_mtime = source.stat().st_mtime
+    base = None
+    with Image.open(source) as image:
+        width, height = image.size
+        variants = []
+        target_widths = sorted({w for w in widths if w < width} | {width})
+        for fmt in formats:
+            if not pil_features.check(fmt):
+                continue
+            for target_width in target_widths:
+                target_height = max(1, round(height * target_width / width))
+                variant_path = optimized_dir / f"{source.stem}-{target_width}.{fmt}"
+                # Re-runs reuse variants that are newer than their source
+                if not variant_path.exists() or variant_path.stat().st_mtime < source_mtime:
+                    if base is None:
+                        has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+                        base = image.convert('RGBA' if has_alpha else 'RGB')
+                    resized = base if target_width == width else base.resize((target_width, target_height), Image.LANCZOS)
+                    # No exif/icc_profile/xmp is passed to save(), so metadata is stripped
+                    resized.save(variant_path, **IMAGE_SAVE_OPTIONS[fmt])
+                variants.append({
+                    'path': str(variant_path.relative_to(output_path)),
+                    'format': fmt,
+                    'width': target_width,
+                    'height': target_height,
+                    'bytes': variant_path.stat().st_size,
+                })
+    
+    return {'width': width, 'height': height, 'variants': variants}
+
+
+# ---------------------------------------------------------------------------
+# Full-text search index
+# ---------------------------------------------------------------------------
+
+SEARCH_INDEX_FILENAME = "search_index.sqlite"
+
+
+class SearchIndex:
+    """
+    SQLite FTS5 index over scraped pages.
+    
+    Pages are written as they are saved and committed in batches, so a crawl
+    that is interrupted still leaves a usable index behind. Re-indexing a URL
+    replaces its previous entry.
+    """
+    
+    def __init__(self, path: Path, batch_size: int = 50):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._pending = 0
+        # The crawl may run in a worker thread (aiter_pages); it is still only
+        # used from one thread at a time
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS documents (
+                id INTEGER PRIMARY KEY,
+                url TEXT UNIQUE NOT NULL,
+                filename TEXT,
+                scraped_at TEXT
+            );
+            CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+                title, description, content, structured_data,
+                tokenize = 'porter unicode61'
+            );
+        """)
+    
+    def add_page(self, url: str, filename: str, title: str, description: str,
+                 content: str, structured_data: List, scraped_at: str):
+        """Insert or replace the index entry for a page"""
+        doc_id = self.conn.execute(
+            """INSERT INTO documents (url, filename, scraped_at) VALUES (?, ?, ?)
+               ON CONFLICT(url) DO UPDATE SET filename = excluded.filename, scraped_at = excluded.scraped_at
+               RETURNING id""",
+            (url, filename, scraped_at)
+        ).fetchone()[0]
+        self.conn.execute("DELETE FROM pages_fts WHERE rowid = ?", (doc_id,))
+        self.conn.execute(
+            "INSERT INTO pages_fts (rowid, title, description, content, structured_data) VALUES (?, ?, ?, ?, ?)",
+            (doc_id, title, description, content, json.dumps(structured_data, ensure_ascii=False))
+        )
+        self._pending += 1
+        if self._pending >= self.batch_size:
+            self.commit()
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Run an FTS5 MATCH query, best matches first"""
+        rows = self.conn.execute(
+            """SELECT d.url, d.filename, highlight(pages_fts, 0, '', ''),
+                      snippet(pages_fts, 2, '[', ']', '...', 16), bm25(pages_fts)
+               FROM pages_fts JOIN documents d ON d.id = pages_fts.rowid
+               WHERE pages_fts MATCH ?
+               ORDER BY rank LIMIT ?""",
+            (query, limit)
+        ).fetchall()
+        return [
+            {'url': url, 'filename': filename, 'title': title, 'snippet': snippet, 'score': score}
+            for url, filename, title, snippet, score in rows
+        ]
+    
+    def commit(self):
+        """Flush pending writes"""
+        self.conn.commit()
+        self._pending = 0
+    
+    def close(self):
+        """Commit and close the database"""
+        self.commit()
+        self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# HTTP transport: per-host pools, DNS cache, TLS session reuse, HTTP/2
+# ---------------------------------------------------------------------------
+
+USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+class DNSCache:
+    """TTL cache in front of socket.getaddrinfo (see install_dns_cache)"""
+    
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: Dict[Tuple, Tuple[float, List]] = {}
+        self._lock = threading.Lock()
+        self._getaddrinfo = socket.getaddrinfo
+    
+    def getaddrinfo(self, host, port, family=0, type=0, proto=0, flags=0):
+        key = (host, port, family, type, proto, flags)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+        result = self._getaddrinfo(host, port, family, type, proto, flags)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (now + self.ttl, result)
+        return result
+    
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else None}
+
+
+_dns_cache: Optional[DNSCache] = None
+
+
+def install_dns_cache(ttl: float = 300.0) -> DNSCache:
+    """Route all name lookups in this process through a shared DNSCache"""
+    global _dns_cache
+    if _dns_cache is None:
+        _dns_cache = DNSCache(ttl)
+        socket.getaddrinfo = _dns_cache.getaddrinfo
+    _dns_cache.ttl = ttl
+    return _dns_cache
+
+
+class _TicketSSLSocket(ssl.SSLSocket):
+    """
+    SSLSocket that hands its TLS session to its context for resumption.
+    
+    TLS 1.3 tickets arrive after the handshake, with the first records
+    read, so the session is offered on the first reads and on close. This
+    works whether or not the server keeps the connection alive.
+    """
+    
+    _session_checks = 0
+    
+    def read(self, len=1024, buffer=None):
+        data = super().read(len, buffer)
+        if self._session_checks < 3:
+            self._session_checks = 3 if self.context.remember_session(self) else self._session_checks + 1
+        return data
+    
+    def close(self):
+        if self._session_checks < 3:
+            self._session_checks = 3
+            self.context.remember_session(self)
+        super().close()
+
+
+class ResumingSSLContext(ssl.SSLContext):
+    """SSLContext that offers the last TLS session per hostname for resumption"""
+    
+    sslsocket_class = _TicketSSLSocket
+    
+    def __init__(self, *args, **kwargs):
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self.handshakes = 0
+        self.resumed = 0
+    
+    def wrap_socket(self, sock, *args, server_hostname=None, session=None, **kwargs):
+        if session is None and server_hostname:
+            session = self._sessions.get(server_hostname)
+        ssl_sock = super().wrap_socket(sock, *args, server_hostname=server_hostname, session=session, **kwargs)
+        self.handshakes += 1
+        if ssl_sock.session_reused:
+            self.resumed += 1
+        self.remember_session(ssl_sock)
+        return ssl_sock
+    
+    def remember_session(self, ssl_sock) -> bool:
+        """
+        Store a socket's TLS session for its hostname. Returns whether it had a ticket.
+        
+        TLS 1.3 delivers session tickets after the handshake, so sockets
+        (_TicketSSLSocket) also call this once data has been read.
+        """
+        hostname = getattr(ssl_sock, 'server_hostname', None)
+        try:
+            session = ssl_sock.session
+        except (OSError, ValueError):
+            return False
+        if hostname and session is not None and session.has_ticket:
+            self._sessions[hostname] = session
+            return True
+        return False
+
+
+def create_tls_context() -> ResumingSSLContext:
+    """Client TLS context with the CA bundle loaded once for all connections"""
+    context = ResumingSSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    try:
+        import certifi
+        context.load_verify_locations(certifi.where())
+    except ImportError:
+        context.load_default_certs()
+    return context
+
+
+class _CountingConnectionMixin:
+    """
+    Counts every socket a connection opens on its pool, including urllib3's
+    silent reconnects after a server closed a kept-alive connection (which
+    num_connections misses).
+    """
+    
+    counting_pool = None
+    
+    def connect(self):
+        super().connect()
+        if self.counting_pool is not None:
+            self.counting_pool.count_connect()
+
+
+class _CountingHTTPConnection(_CountingConnectionMixin, urllib3.connection.HTTPConnection):
+    pass
+
+
+class _CountingHTTPSConnection(_CountingConnectionMixin, urllib3.connection.HTTPSConnection):
+    pass
+
+
+class _CountingPoolMixin:
+    """Connection pool that tallies real connects (see _CountingConnectionMixin)"""
+    
+    def __init__(self, *args, **kwargs):
+        self.connects = 0
+        self._connects_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+    
+    def count_connect(self):
+        with self._connects_lock:
+            self.connects += 1
+    
+    def _new_conn(self):
+        conn = super()._new_conn()
+        conn.counting_pool = self
+        return conn
+
+
+class _CountingHTTPConnectionPool(_CountingPoolMixin, urllib3.HTTPConnectionPool):
+    ConnectionCls = _CountingHTTPConnection
+
+
+class _CountingHTTPSConnectionPool(_CountingPoolMixin, urllib3.HTTPSConnectionPool):
+    ConnectionCls = _CountingHTTPSConnection
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter with a sized pool and a shared (session-resuming) TLS context"""
+    
+    def __init__(self, ssl_context: ssl.SSLContext, pool_maxsize: int = 10):
+        self._ssl_context = ssl_context
+        super().__init__(pool_connections=4, pool_maxsize=pool_maxsize)
+    
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['ssl_context'] = self._ssl_context
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {'http': _CountingHTTPConnectionPool,
+                                                   'https': _CountingHTTPSConnectionPool}
+    
+    def cert_verify(self, conn, url, verify, cert):
+        super().cert_verify(conn, url, verify, cert)
+        if verify is True:
+            # The CA bundle is already loaded into the shared context; leaving
+            # ca_certs set would make urllib3 reload it for every connection
+            conn.ca_certs = None
+            conn.ca_cert_dir = None
+    
+    def pool_stats(self) -> Dict[str, Dict[str, int]]:
+        """Requests and connects (sockets actually opened) per host for live pools"""
+        stats = {}
+        pools = self.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host_stats = stats.setdefault(pool.host, {'requests': 0, 'connections': 0})
+            host_stats['requests'] += pool.num_requests
+            host_stats['connections'] += getattr(pool, 'connects', pool.num_connections)
+        return stats
+
+
+# ---------------------------------------------------------------------------
+# Rendered-DOM cache
+# ---------------------------------------------------------------------------
+
+RENDER_CACHE_DIR = "render_cache"
+
+# Per-response tokens that change on every request without changing the page
+VOLATILE_HTML_RE = re.compile(rb'\s(?:nonce|data-nonce|csrf-token|data-csrf)="[^"]*"', re.IGNORECASE)
+SCRIPT_SRC_RE = re.compile(rb'<script\b[^>]*\ssrc=["\']([^"\']+)["\']', re.IGNORECASE)
+
+
+def render_fingerprint(raw_html: bytes) -> str:
+    """
+    Fingerprint a raw (unrendered) HTTP response body.
+    
+    Volatile attributes such as nonces are dropped, and the page's script
+    bundle URLs are hashed in explicitly: site builders version bundles by
+    URL, so a new deploy changes the fingerprint even if the HTML shell
+    does not.
+    """
+    digest = hashlib.sha256(VOLATILE_HTML_RE.sub(b'', raw_html))
+    for src in sorted(set(SCRIPT_SRC_RE.findall(raw_html))):
+        digest.update(b'\0' + src)
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Rendered page_source per URL, valid while the raw response fingerprint matches"""
+    
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+    
+    def _path(self, url: str) -> Path:
+        return self.directory / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+    
+    def get(self, url: str, fingerprint: str) -> Optional[str]:
+        """Return the cached render if it was made from an identical raw response"""
+        path = self._path(url)
+        try:
+            entry = json.loads(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            entry = None
+        if entry and entry.get('fingerprint') == fingerprint:
+            self.hits += 1
+            return entry['html']
+        self.misses += 1
+        return None
+    
+    def fingerprint(self, url: str) -> Optional[str]:
+        """Fingerprint of the raw response the URL's cached render was made from"""
+        try:
+            return json.loads(self._path(url).read_text(encoding='utf-8')).get('fingerprint')
+        except (OSError, ValueError):
+            return None
+    
+    def put(self, url: str, fingerprint: str, html: str):
+        _write_json_atomic(self._path(url), {
+            'url': url,
+            'fingerprint': fingerprint,
+            'rendered_at': datetime.now().isoformat(),
+            'html': html,
+        })
+    
+    def stats(self) -> Dict:
+        return {'hits': self.hits, 'misses': self.misses}
+
+
+# ---------------------------------------------------------------------------
+# Record/replay cassettes
+# ---------------------------------------------------------------------------
+
+CASSETTE_MODES = ('record', 'replay')
+
+# Headers describing the wire encoding of a body that is stored decoded
+WIRE_HEADERS = {'content-encoding', 'content-length', 'transfer-encoding'}
+
+
+class Cassette:
+    """
+    On-disk store of HTTP responses, and optionally rendered DOMs, for
+    deterministic re-runs.
+    
+    Entries are keyed by method and URL. Each one is a JSON metadata file
+    next to the raw body under responses/, and renders are kept under
+    renders/, so a cassette can be inspected or trimmed by hand.
+    """
+    
+    def __init__(self, directory: Path, mode: str = 'record', record_renders: bool = True):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.directory = Path(directory)
+        self.mode = mode
+        self.record_renders = record_renders
+        if self.replaying and not (self.directory / "responses").is_dir():
+            raise FileNotFoundError(f"No cassette at {self.directory}")
+        (self.directory / "responses").mkdir(parents=True, exist_ok=True)
+        (self.directory / "renders").mkdir(exist_ok=True)
+        self.recorded = 0
+        self.hits = 0
+        self.misses = 0
+    
+    @property
+    def recording(self) -> bool:
+        return self.mode == 'record'
+    
+    @property
+    def replaying(self) -> bool:
+        return self.mode == 'replay'
+    
+    @staticmethod
+    def _key(method: str, url: str) -> str:
+        return hashlib.sha256(f"{method.upper()} {url}".encode('utf-8')).hexdigest()
+    
+    def _response_paths(self, method: str, url: str) -> Tuple[Path, Path]:
+        base = self.directory / "responses" / self._key(method, url)
+        return base.with_suffix('.json'), base.with_suffix('.body')
+    
+    def record(self, request: requests.PreparedRequest, response: requests.Response):
+        meta_path, body_path = self._response_paths(request.method, request.url)
+        tmp_path = body_path.with_suffix(f'.tmp{threading.get_ident()}')
+        tmp_path.write_bytes(response.content)
+        os.replace(tmp_path, body_path)
+        _write_json_atomic(meta_path, {
+            'method': request.method,
+            'url': request.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': {k: v for k, v in response.headers.items() if k.lower() not in WIRE_HEADERS},
+            'recorded_at': datetime.now().isoformat(),
+        })
+        self.recorded += 1
+    
+    def record_error(self, request: requests.PreparedRequest, error: Exception):
+        """Record a transport failure so replays fail the same way"""
+        meta_path, _ = self._response_paths(request.method, request.url)
+        _write_json_atomic(meta_path, {
+            'method': request.method,
+            'url': request.url,
+            'error': f"{type(error).__name__}: {error}",
+            'recorded_at': datetime.now().isoformat(),
+        })
+        self.recorded += 1
+    
+    def replay(self, request: requests.PreparedRequest) -> requests.Response:
+        """Build the recorded response for a request, or raise ConnectionError"""
+        meta_path, body_path = self._response_paths(request.method, request.url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            body = b'' if 'error' in meta else body_path.read_bytes()
+        except (OSError, ValueError):
+            self.misses += 1
+            raise requests.ConnectionError(f"Not in cassette: {request.url}", request=request)
+        self.hits += 1
+        if 'error' in meta:
+            raise requests.ConnectionError(f"Recorded failure: {meta['error']}", request=request)
+        
+        response = requests.Response()
+        response.status_code = meta['status']
+        response.reason = meta.get('reason')
+        response.headers = requests.structures.CaseInsensitiveDict(meta['headers'])
+        response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+        response.url = request.url
+        response.request = request
+        response._content = body
+        response._content_consumed = True
+        return response
+    
+    def put_render(self, url: str, html: str):
+        if self.recording and self.record_renders:
+            path = self.directory / "renders" / f"{self._key('RENDER', url)}.html"
+            tmp_path = path.with_suffix(f'.tmp{threading.get_ident()}')
+            tmp_path.write_text(html, encoding='utf-8')
+            os.replace(tmp_path, path)
+    
+    def get_render(self, url: str) -> Optional[str]:
+        try:
+            return (self.directory / "renders" / f"{self._key('RENDER', url)}.html").read_text(encoding='utf-8')
+        except OSError:
+            return None
+    
+    def has_renders(self) -> bool:
+        return any((self.directory / "renders").glob("*.html"))
+    
+    def stats(self) -> Dict:
+        return {'mode': self.mode, 'directory': str(self.directory),
+                'recorded': self.recorded, 'hits': self.hits, 'misses': self.misses}
+
+
+class CassetteAdapter(HTTPAdapter):
+    """Transport adapter that records through `upstream`, or replays without network"""
+    
+    def __init__(self, cassette: Cassette, upstream: Optional[HTTPAdapter] = None):
+        super().__init__()
+        self.cassette = cassette
+        self.upstream = upstream
+    
+    def send(self, request, **kwargs):
+        if self.cassette.replaying:
+            response = self.cassette.replay(request)
+            response.connection = self
+            return response
+        try:
+            response = self.upstream.send(request, **kwargs)
+            expires = getattr(_fetch_deadline, 'expires', None)
+            if kwargs.get('stream') and expires is not None:
+                # Recording reads the whole body; keep to the caller's deadline
+                try:
+                    response._content = read_within(_body_chunks(response), expires, request.url)
+                except Exception:
+                    response.close()
+                    raise
+                response._content_consumed = True
+        except (requests.ConnectionError, requests.Timeout) as e:
+            self.cassette.record_error(request, e)
+            raise
+        self.cassette.record(request, response)
+        return response
+    
+    def close(self):
+        if self.upstream:
+            self.upstream.close()
+        super().close()
+
+
+# ---------------------------------------------------------------------------
+# Page metadata and boilerplate (site template) detection
+# ---------------------------------------------------------------------------
+
+
+# Pages stay bytes from the response to disk. Their encoding is worked out
+# once, from the byte order mark, the Content-Type charset or a <meta>
+# declaration (or, with none, whether the bytes are valid UTF-8), and handed
+# to BeautifulSoup so nothing is decoded twice.
+META_CHARSET_PATTERN = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?\s*([\w.:-]+)', re.IGNORECASE)
+HEADER_CHARSET_PATTERN = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+# The HTML spec prescans 1024 bytes; allow for long <head> scripts before <meta>
+META_CHARSET_PREFIX = 4096
+# Labels HTML treats as windows-1252
+WINDOWS_1252_ALIASES = {'ascii', 'latin-1', 'iso8859-1'}
+
+
+def detect_html_encoding(body: bytes, content_type: Optional[str] = None) -> str:
+    """
+    Encoding of an HTML body from its BOM, HTTP charset or <meta> charset.
+    
+    Undeclared bodies are UTF-8 if they decode as such and windows-1252
+    otherwise, which is what legacy pages without a charset nearly always are.
+    """
+    if body.startswith(codecs.BOM_UTF8):
+        return 'utf-8'
+    if body.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return 'utf-16'
+    
+    labels = []
+    header_match = HEADER_CHARSET_PATTERN.search(content_type or '')
+    if header_match:
+        labels.append(header_match.group(1))
+    meta_match = META_CHARSET_PATTERN.search(body, 0, META_CHARSET_PREFIX)
+    if meta_match:
+        labels.append(meta_match.group(1).decode('ascii'))
+    for label in labels:
+        try:
+            name = codecs.lookup(label).name
+        except LookupError:
+            continue
+        return 'cp1252' if name in WINDOWS_1252_ALIASES else name
+    try:
+        # The whole body: a truncated sequence at the end (b'caf\xe9') is not UTF-8
+        body.decode('utf-8')
+    except UnicodeDecodeError:
+        return 'cp1252'
+    return 'utf-8'
+
+
+def extract_page_metadata(soup: BeautifulSoup) -> Tuple[str, str, List]:
+    """Return (title, meta description, JSON-LD structured data) of a parsed page"""
+    title = soup.find('title')
+    title_text = title.get_text() if title else ""
+    
+    meta_description = soup.find('meta', attrs={'name': 'description'})
+    description = meta_description.get('content', '') if meta_description else ""
+    
+    structured_data = []
+    for script in soup.find_all('script', type='application/ld+json'):
+        try:
+            structured_data.append(json.loads(script.string))
+        except:
+            pass
+    return title_text, description, structured_data
+
+
+BOILERPLATE_FILENAME = "boilerplate.json"
+
+# Text is grouped into blocks by its nearest enclosing element of these kinds
+TEXT_BLOCK_TAGS = {
+    'title', 'header', 'nav', 'footer', 'aside', 'main', 'article', 'section', 'div',
+    'p', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'ul', 'ol', 'li', 'dl', 'dt', 'dd',
+    'table', 'tr', 'td', 'th', 'form', 'blockquote', 'pre', 'figure', 'figcaption',
+    'address', 'details', 'summary',
+}
+SKIPPED_TEXT_TAGS = {'script', 'style', 'noscript', 'template'}
+
+
+def iter_text_blocks(soup: BeautifulSoup) -> List[Tuple[str, str]]:
+    """
+    Split a page's visible text into DOM blocks.
+    
+    Each string belongs to its nearest block-level ancestor. A block's id
+    hashes its tag path and whitespace-normalized text, so the same nav or
+    footer gets the same id on every page of a site.
+    
+    Returns:
+        [(block_id, text)] in document order, lines joined like get_text()
+    """
+    blocks: Dict[int, Tuple[Optional[object], List[str]]] = {}
+    for string in soup.find_all(string=True):
+        if type(string) not in (NavigableString, CData):
+            continue
+        text = string.strip()
+        if not text:
+            continue
+        block = None
+        for parent in string.parents:
+            if parent.name in SKIPPED_TEXT_TAGS:
+                block = False
+                break
+            if parent.name in TEXT_BLOCK_TAGS:
+                block = parent
+                break
+        if block is False:
+            continue
+        blocks.setdefault(id(block), (block, []))[1].append(text)
+    
+    result = []
+    for block, lines in blocks.values():
+        path = '>'.join([p.name for p in reversed(list(block.parents))] + [block.name]) if block else ''
+        text = '\n'.join(lines)
+        key = f"{path}\0{' '.join(text.split())}".encode('utf-8')
+        result.append((hashlib.sha1(key).hexdigest()[:16], text))
+    return result
+
+
+class TemplateDetector:
+    """
+    Learns a site's template from how often text blocks repeat across pages.
+    
+    A block that appears on at least `min_pages` pages and at least
+    `min_share` of the pages seen so far is boilerplate (navigation, header,
+    footer, cookie banners). Text is only kept for blocks seen more than once.
+    Each URL is counted once, so pages saved again on a revisit do not skew
+    the shares.
+    """
+    
+    def __init__(self, min_pages: int = 3, min_share: float = 0.5):
+        self.min_pages = min_pages
+        self.min_share = min_share
+        self.pages = 0
+        self.page_urls: Set[str] = set()
+        self.block_pages: Dict[str, int] = {}
+        self.block_text: Dict[str, str] = {}
+    
+    def add_page(self, url: str, blocks: List[Tuple[str, str]]):
+        if url in self.page_urls:
+            return
+        self.page_urls.add(url)
+        self.pages += 1
+        seen = set()
+        for block_id, text in blocks:
+            if block_id in seen:
+                continue
+            seen.add(block_id)
+            count = self.block_pages.get(block_id, 0) + 1
+            self.block_pages[block_id] = count
+            if count == 2:
+                self.block_text[block_id] = text
+    
+    def is_boilerplate(self, block_id: str) -> bool:
+        count = self.block_pages.get(block_id, 0)
+        return count >= self.min_pages and count >= self.min_share * self.pages
+    
+    def split(self, blocks: List[Tuple[str, str]]) -> Tuple[str, List[str]]:
+        """Return (main content text, ids of the boilerplate blocks on the page)"""
+        main, boilerplate = [], []
+        for block_id, text in blocks:
+            if self.is_boilerplate(block_id):
+                if block_id not in boilerplate:
+                    boilerplate.append(block_id)
+            else:
+                main.append(text)
+        return '\n'.join(main), boilerplate
+    
+    def boilerplate(self) -> Dict[str, Dict]:
+        """Boilerplate blocks with their text and page counts"""
+        return {
+            block_id: {'text': self.block_text.get(block_id, ''), 'pages': count}
+            for block_id, count in sorted(self.block_pages.items(), key=lambda item: -item[1])
+            if self.is_boilerplate(block_id)
+        }
+
+
+# ---------------------------------------------------------------------------
+# Hosted platforms (Squarespace JSON fast path)
+# ---------------------------------------------------------------------------
+
+# Markers in response headers or the start of the HTML identifying a hosted platform
+PLATFORM_MARKERS = {
+    'squarespace': (b'Static.SQUARESPACE_CONTEXT', b'<!-- This is Squarespace. -->', b'static1.squarespace.com'),
+    'wix': (b'content="Wix.com Website Builder"', b'static.parastorage.com', b'wix-warmup-data'),
+}
+PLATFORM_SNIFF_BYTES = 65536
+
+
+def detect_platform(body: bytes, headers: Optional[Dict] = None) -> Optional[str]:
+    """Name of the hosted platform that served a page ('squarespace', 'wix'), if recognisable"""
+    headers = headers or {}
+    if 'squarespace' in headers.get('Server', '').lower():
+        return 'squarespace'
+    if any(name.lower().startswith('x-wix-') for name in headers):
+        return 'wix'
+    head = body[:PLATFORM_SNIFF_BYTES]
+    for platform, markers in PLATFORM_MARKERS.items():
+        if any(marker in head for marker in markers):
+            return platform
+    return None
+
+
+def squarespace_json_url(url: str) -> str:
+    """The ?format=json endpoint Squarespace serves for every page"""
+    parsed = urlparse(url)
+    query = f"{parsed.query}&format=json" if parsed.query else "format=json"
+    return urlunparse(parsed._replace(query=query, fragment=''))
+
+
+def squarespace_supplement(data: Dict) -> BeautifulSoup:
+    """
+    Markup for what a Squarespace ?format=json response holds beyond the
+    server-rendered HTML: page and item bodies (with their lazy-loaded
+    images), every collection item (link, image, excerpt) and the next page
+    of a paginated collection.
+    """
+    supplement = BeautifulSoup('', 'html.parser')
+    
+    def add_markup(markup):
+        if isinstance(markup, str) and markup.strip():
+            supplement.append(BeautifulSoup(markup, 'html.parser'))
+    
+    def add_tag(name: str, **attrs):
+        supplement.append(supplement.new_tag(name, attrs=attrs))
+    
+    item = data.get('item') or {}
+    add_markup(data.get('mainContent'))
+    add_markup(item.get('body'))
+    
+    for entry in [data.get('collection') or {}, item, *(data.get('items') or [])]:
+        if not isinstance(entry, dict):
+            continue
+        if entry.get('fullUrl'):
+            add_tag('a', href=entry['fullUrl'])
+        asset_url = entry.get('assetUrl') or (entry.get('mainImage') or {}).get('assetUrl')
+        if asset_url:
+            add_tag('img', src=asset_url)
+        add_markup(entry.get('excerpt'))
+    
+    next_page = (data.get('pagination') or {}).get('nextPageUrl')
+    if next_page:
+        add_tag('a', href=next_page)
+    return supplement
+
+
+# ---------------------------------------------------------------------------
+# Crawl budgets
+# ---------------------------------------------------------------------------
+
+# Budget pressure (0 = untouched, 1 = used up) at which each kind of work is
+# dropped. Renders and large media go first; pages run until the end.
+BUDGET_CUTOFFS = {
+    'videos': 0.25,
+    'render': 0.5,
+    'images': 0.6,
+    'other': 0.75,
+    'fonts': 0.85,
+    'css': 0.9,
+    'js': 0.9,
+    'page': 1.0,
+}
+
+BYTE_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+
+
+def parse_byte_size(value: str) -> int:
+    """Parse a byte count such as 500000, 200M or 2G (binary units)"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*', value, re.IGNORECASE)
+    if not match:
+        raise ValueError(f"invalid size: {value!r}")
+    return int(float(match.group(1)) * BYTE_SIZE_UNITS[match.group(2).upper()])
+
+
+class CrawlBudget:
+    """
+    Wall-clock and byte limits for a crawl.
+    
+    pressure() rises from 0 to 1 as the tightest limit is used up. The
+    scraper asks allows() before optional work, so renders and media are
+    dropped first (see BUDGET_CUTOFFS), and stops taking new pages once a
+    global limit is reached. Byte counts are charged after each response,
+    so a limit can be overshot by the requests already in flight.
+    """
+    
+    def __init__(self, max_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 max_host_bytes: Optional[int] = None):
+        self.max_seconds = max_seconds
+        self.max_bytes = max_bytes
+        self.max_host_bytes = max_host_bytes
+        self.started = time.monotonic()
+        self.bytes_total = 0
+        self.bytes_by_host: Dict[str, int] = {}
+        self.skipped = {'pages': 0, 'renders': 0, 'assets': 0}
+        self.stop_reason: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        self.started = time.monotonic()
+    
+    def charge(self, url: str, nbytes: int):
+        host = urlparse(url).netloc
+        with self._lock:
+            self.bytes_total += nbytes
+            self.bytes_by_host[host] = self.bytes_by_host.get(host, 0) + nbytes
+    
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+    
+    def pressure(self, url: Optional[str] = None) -> float:
+        """Fraction of the tightest applicable limit already used"""
+        levels = [0.0]
+        if self.max_seconds:
+            levels.append(self.elapsed() / self.max_seconds)
+        if self.max_bytes:
+            levels.append(self.bytes_total / self.max_bytes)
+        if url and self.max_host_bytes:
+            levels.append(self.bytes_by_host.get(urlparse(url).netloc, 0) / self.max_host_bytes)
+        return min(1.0, max(levels))
+    
+    def allows(self, kind: str, url: Optional[str] = None) -> bool:
+        """Whether work of this kind ('page', 'render' or an asset type) still fits"""
+        if self.pressure(url) < BUDGET_CUTOFFS.get(kind, BUDGET_CUTOFFS['other']):
+            return True
+        key = 'pages' if kind == 'page' else 'renders' if kind == 'render' else 'assets'
+        with self._lock:
+            self.skipped[key] += 1
+        return False
+    
+    def exhausted(self) -> Optional[str]:
+        """Name of the global limit that has run out, if any"""
+        if self.max_seconds and self.elapsed() >= self.max_seconds:
+            return 'time'
+        if self.max_bytes and self.bytes_total >= self.max_bytes:
+            return 'bytes'
+        return None
+    
+    def stats(self) -> Dict:
+        return {
+            'max_seconds': self.max_seconds,
+            'max_bytes': self.max_bytes,
+            'max_host_bytes': self.max_host_bytes,
+            'elapsed_seconds': round(self.elapsed(), 1),
+            'bytes_total': self.bytes_total,
+            'bytes_by_host': dict(self.bytes_by_host),
+            'skipped': dict(self.skipped),
+            'stop_reason': self.stop_reason,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Deadlines and latency
+# ---------------------------------------------------------------------------
+
+# Extra time a render gets beyond the page timeout (fixed waits and scrolling)
+# before the watchdog kills its browser session
+RENDER_WATCHDOG_GRACE = 30.0
+# How long the watchdog waits for a clean driver.quit() before killing processes
+RENDER_QUIT_TIMEOUT = 10.0
+# Samples kept per host for percentiles
+LATENCY_SAMPLES = 10000
+
+
+class DeadlineExceeded(requests.Timeout):
+    """A fetch ran past its total deadline"""
+
+
+def reset_browser_tabs(address: str, timeout: float = 5.0):
+    """
+    Replace every page of a remote-debugging Chrome with one blank tab.
+    
+    Uses the DevTools HTTP endpoints, which still answer while a page's
+    renderer is stuck, so the next session does not attach to that page.
+    """
+    endpoint = f"http://{address}/json"
+    pages = [target for target in requests.get(f"{endpoint}/list", timeout=timeout).json()
+             if target.get('type') == 'page']
+    # Chrome >= 111 only opens tabs on PUT; open one first so the browser keeps a window
+    requests.put(f"{endpoint}/new?about:blank", timeout=timeout)
+    for target in pages:
+        requests.get(f"{endpoint}/close/{target['id']}", timeout=timeout)
+
+
+# Expiry (time.monotonic) of the fetch in progress on this thread, so transport
+# adapters that read the body themselves (cassette recording) keep to it
+_fetch_deadline = threading.local()
+
+
+def _body_chunks(response: requests.Response) -> Iterator[bytes]:
+    """Decoded chunks of a streamed response body, as soon as they arrive"""
+    raw = response.raw
+    if hasattr(raw, 'read1'):
+        # urllib3 >= 2.3: returns as soon as any data arrives
+        return iter(lambda: raw.read1(65536, decode_content=True), b'')
+    return response.iter_content(1024)
+
+
+def read_within(chunks, expires: float, url: str) -> bytes:
+    """Join body chunks, raising DeadlineExceeded once time.monotonic() passes expires"""
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        if time.monotonic() > expires:
+            raise DeadlineExceeded(f"Deadline exceeded for {url}")
+    return b''.join(body)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Request durations per host (and for renders), summarised as p50/p95/p99"""
+    
+    def __init__(self):
+        self._samples: Dict[str, List[float]] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.deadline_exceeded = 0
+        self.hung_renders = 0
+    
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            if len(samples) < LATENCY_SAMPLES:
+                samples.append(seconds)
+            else:
+                # Reservoir sampling keeps the kept samples representative
+                slot = int.from_bytes(os.urandom(4), 'little') % count
+                if slot < LATENCY_SAMPLES:
+                    samples[slot] = seconds
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            snapshot = {key: sorted(samples) for key, samples in self._samples.items()}
+        hosts = {}
+        for key, values in sorted(snapshot.items()):
+            hosts[key] = {
+                'requests': self._counts[key],
+                'p50': round(_percentile(values, 0.50), 3),
+                'p95': round(_percentile(values, 0.95), 3),
+                'p99': round(_percentile(values, 0.99), 3),
+                'max': round(values[-1], 3),
+            }
+        return {'hosts': hosts, 'deadline_exceeded': self.deadline_exceeded, 'hung_renders': self.hung_renders}
+
+
+# ---------------------------------------------------------------------------
+# Profiling (--profile)
+# ---------------------------------------------------------------------------
+
+PROFILE_COLLAPSED_FILENAME = "profile.collapsed"
+PROFILE_REPORT_FILENAME = "profile_report.txt"
+
+
+class CrawlProfiler:
+    """
+    Sampling profiler plus tracemalloc over a crawl, attributed to stages.
+    
+    A background thread samples the stacks of threads that are inside a
+    stage every `interval` seconds. Each sample is recorded as
+    "stage;...;caller;callee" so the collapsed output can be fed straight
+    to flamegraph.pl or speedscope. Allocation growth is measured per stage
+    and between snapshots taken at the start and end of the crawl.
+    """
+    
+    def __init__(self, interval: float = 0.005, traceback_frames: int = 10, top: int = 25):
+        self.interval = interval
+        self.traceback_frames = traceback_frames
+        self.top = top
+        self.samples: Dict[str, int] = {}
+        self.stage_stats: Dict[str, Dict] = {}
+        self._stages: Dict[int, List[str]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started = 0.0
+        self._elapsed = 0.0
+        self._baseline = None
+        self._final = None
+        self._owns_tracemalloc = False
+    
+    def start(self):
+        if self._thread:
+            return
+        # Leave tracing on at the end if someone else turned it on
+        self._owns_tracemalloc = not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start(self.traceback_frames)
+        self._baseline = tracemalloc.take_snapshot()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample_loop, name="crawl-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        if not self._thread:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self._elapsed = time.perf_counter() - self._started
+        self._final = tracemalloc.take_snapshot()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+    
+    @contextmanager
+    def stage(self, name: str):
+        """Attribute samples and allocations in this block to `name`"""
+        ident = threading.get_ident()
+        stack = self._stages.setdefault(ident, [])
+        stack.append(name)
+        started = time.perf_counter()
+        memory_before = tracemalloc.get_traced_memory()[0]
+        try:
+            yield
+        finally:
+            allocated = tracemalloc.get_traced_memory()[0] - memory_before
+            stack.pop()
+            if not stack:
+                self._stages.pop(ident, None)
+            with self._lock:
+                stats = self._stage_entry(name)
+                stats['calls'] += 1
+                stats['seconds'] += time.perf_counter() - started
+                stats['net_bytes'] += allocated
+    
+    @staticmethod
+    def _own_allocations() -> List[tracemalloc.Filter]:
+        """Filters dropping memory allocated by the profiler's own bookkeeping (samples, stage stats)"""
+        import dis
+        
+        lines = set()
+        for method in (CrawlProfiler._sample_loop, CrawlProfiler._stage_entry, CrawlProfiler.stage.__wrapped__):
+            lines.update(line for _, line in dis.findlinestarts(method.__code__) if line)
+        return [tracemalloc.Filter(False, __file__, line, all_frames=True) for line in sorted(lines)]
+    
+    def _stage_entry(self, name: str) -> Dict:
+        return self.stage_stats.setdefault(name, {'calls': 0, 'seconds': 0.0, 'samples': 0, 'net_bytes': 0})
+    
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for ident, stages in list(self._stages.items()):
+                frame = frames.get(ident)
+                if ident == own or frame is None or not stages:
+                    continue
+                calls = []
+                while frame is not None:
+                    code = frame.f_code
+                    calls.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                key = ';'.join(list(stages) + calls[::-1])
+                with self._lock:
+                    self.samples[key] = self.samples.get(key, 0) + 1
+                    self._stage_entry(stages[-1])['samples'] += 1
+    
+    def write(self, output_dir: Path) -> Tuple[Path, Path]:
+        """Write the collapsed stacks and the stage/allocation report"""
+        output_dir = Path(output_dir)
+        collapsed_path = output_dir / PROFILE_COLLAPSED_FILENAME
+        report_path = output_dir / PROFILE_REPORT_FILENAME
+        
+        with open(collapsed_path, 'w', encoding='utf-8') as f:
+            for key, count in sorted(self.samples.items()):
+                f.write(f"{key} {count}\n")
+        
+        total_samples = sum(self.samples.values())
+        lines = [
+            f"Crawl profile: {self._elapsed:.1f}s wall, {total_samples} samples "
+            f"every {self.interval * 1000:g} ms",
+            "",
+            f"{'stage':<16}{'calls':>8}{'wall s':>10}{'samples':>10}{'net KiB':>12}",
         ]
-    )
-    return logging.getLogger(__name__)
+        for name, stats in sorted(self.stage_stats.items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{name:<16}{stats['calls']:>8}{stats['seconds']:>10.2f}"
+                         f"{stats['samples']:>10}{stats['net_bytes'] / 1024:>12.1f}")
+        
+        if self._baseline and self._final:
+            ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+                      tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                      tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+                      *self._own_allocations()]
+            final = self._final.filter_traces(ignore)
+            growth = final.compare_to(self._baseline.filter_traces(ignore), 'traceback')
+            lines += ["", f"Top {self.top} allocation sites by growth since the crawl started:"]
+            for stat in growth[:self.top]:
+                lines.append(f"  {stat.size_diff / 1024:+10.1f} KiB {stat.count_diff:+8} blocks  "
+                             f"(now {stat.size / 1024:.1f} KiB)")
+                # Innermost frames first
+                lines.extend(f"      {frame.filename}:{frame.lineno}" for frame in list(stat.traceback)[:-4:-1])
+            lines += ["", f"Top {self.top} allocation sites still live at the end of the crawl:"]
+            for stat in final.statistics('lineno')[:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"  {stat.size / 1024:10.1f} KiB {stat.count:8} blocks  {frame.filename}:{frame.lineno}")
+        
+        report_path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+        return collapsed_path, report_path
+
+
+# ---------------------------------------------------------------------------
+# Output storage (--storage)
+# ---------------------------------------------------------------------------
+
+STORAGE_MANIFEST_KEY = ".storage_manifest.json"
+
+
+class Storage:
+    """
+    Where crawl output is written: files under a local directory.
+    
+    Keys are output-relative paths such as "pages/index.html". This is the
+    default backend; S3Storage also publishes every object to a bucket.
+    """
+    
+    remote = False
+    
+    def __init__(self, root: Path):
+        self.root = Path(root)
+    
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None):
+        """Store an existing file (a no-op when it already is the local copy)"""
+        destination = self.root / key
+        if Path(path).resolve() != destination.resolve():
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(path, destination)
+    
+    def put_tree(self, prefix: str, directory: Path) -> int:
+        """Store every file under directory as prefix/<relative path>. Returns the file count"""
+        directory = Path(directory)
+        count = 0
+        for path in sorted(directory.rglob('*')):
+            if path.is_file():
+                self.put_file(f"{prefix}/{path.relative_to(directory).as_posix()}", path)
+                count += 1
+        return count
+    
+    def flush(self):
+        """Wait until everything put so far is stored"""
+    
+    def close(self):
+        self.flush()
+    
+    def stats(self) -> Dict:
+        return {'backend': 'local', 'root': str(self.root)}
+
+
+class S3Storage(Storage):
+    """
+    Storage in an S3-compatible bucket (AWS S3, MinIO, ...), written through
+    a local copy under `root` that the render cache, search index, mirror
+    and reprocess read back.
+    
+    Uploads run on a thread pool so the crawl never waits on them. Small
+    objects are buffered and handed to a worker in batches (batch_size
+    objects or batch_bytes, whichever comes first); objects over
+    multipart_threshold go through boto3's managed transfer as concurrent
+    multipart uploads, streamed from disk for put_file(). A manifest of
+    key -> SHA-256 is kept in the bucket: an object whose key already holds
+    the same content is not uploaded again, and content already stored (or
+    being uploaded) under another key is copied server side instead, once
+    that upload is done. Requires boto3.
+    """
+    
+    remote = True
+    
+    def __init__(self, root: Path, url: str, endpoint_url: Optional[str] = None, concurrency: int = 8,
+                 batch_size: int = 64, batch_bytes: int = 8 * 1024 * 1024,
+                 multipart_threshold: int = 8 * 1024 * 1024, client=None):
+        super().__init__(root)
+        parsed = urlparse(url)
+        if parsed.scheme != 's3' or not parsed.netloc:
+            raise ValueError(f"Expected s3://bucket[/prefix], got {url}")
+        self.bucket = parsed.netloc
+        self.prefix = parsed.path.strip('/')
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self.multipart_threshold = multipart_threshold
+        
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        self.client = client or boto3.client('s3', endpoint_url=endpoint_url)
+        self.transfer_config = TransferConfig(multipart_threshold=multipart_threshold,
+                                              multipart_chunksize=multipart_threshold,
+                                              max_concurrency=concurrency)
+        self.pool = ThreadPoolExecutor(max_workers=max(1, concurrency))
+        self._lock = threading.Lock()
+        self._batch: List[Tuple[str, bytes, Optional[str], str]] = []
+        self._batch_size_bytes = 0
+        self._futures: List[Future] = []
+        
+        # key -> content hash of what the bucket holds, and the reverse
+        # (including content whose upload is still queued)
+        self.manifest: Dict[str, str] = self._load_manifest()
+        self._by_hash: Dict[str, str] = {digest: key for key, digest in self.manifest.items()}
+        # Content hash of a queued upload -> objects with the same content,
+        # copied from it once it is stored
+        self._waiting: Dict[str, List[Tuple]] = {}
+        self._manifest_dirty = False
+        self.counts = {'uploaded': 0, 'multipart': 0, 'copied': 0, 'skipped': 0, 'failed': 0, 'bytes': 0}
+    
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+    
+    def _load_manifest(self) -> Dict[str, str]:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=self._key(STORAGE_MANIFEST_KEY))
+        except self.client.exceptions.NoSuchKey:
+            return {}
+        return json.loads(response['Body'].read())
+    
+    def put(self, key: str, data: bytes, content_type: Optional[str] = None):
+        super().put(key, data, content_type)
+        self._publish(key, data, content_type, hashlib.sha256(data).hexdigest(), len(data))
+    
+    def put_file(self, key: str, path: Path, content_type: Optional[str] = None):
+        super().put_file(key, path, content_type)
+        local = self.root / key
+        size = local.stat().st_size
+        if size < self.multipart_threshold:
+            data = local.read_bytes()
+            self._publish(key, data, content_type, hashlib.sha256(data).hexdigest(), size)
+            return
+        # Large files are hashed in chunks and uploaded straight from disk
+        digest = hashlib.sha256()
+        with open(local, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        self._publish(key, local, content_type, digest.hexdigest(), size)
+    
+    def _publish(self, key: str, body, content_type: Optional[str], digest: str, size: int):
+        """Queue body (bytes, or a Path to a large file) for upload under key"""
+        with self._lock:
+            if self.manifest.get(key) == digest:
+                self.counts['skipped'] += 1
+                return
+            waiting = self._waiting.get(digest)
+            if waiting is not None:
+                if self._by_hash.get(digest) == key:
+                    self.counts['skipped'] += 1  # Already queued for this key
+                else:
+                    waiting.append((key, body, content_type, digest, size))
+                return
+            existing = self._by_hash.get(digest)
+            if existing is not None and self.manifest.get(existing) == digest:
+                self._futures.append(self.pool.submit(self._copy, existing, key, digest))
+                return
+            self._enqueue(key, body, content_type, digest, size)
+    
+    def _enqueue(self, key: str, body, content_type: Optional[str], digest: str, size: int):
+        """Queue an upload; later objects with its content wait for it (caller holds the lock)"""
+        self._by_hash[digest] = key
+        self._waiting[digest] = []
+        if size >= self.multipart_threshold:
+            self._futures.append(self.pool.submit(self._upload_large, key, body, content_type, digest, size))
+            return
+        self._batch.append((key, body, content_type, digest))
+        self._batch_size_bytes += size
+        if len(self._batch) >= self.batch_size or self._batch_size_bytes >= self.batch_bytes:
+            self._submit_batch()
+    
+    def _submit_batch(self):
+        """Hand the buffered small objects to one worker (caller holds the lock)"""
+        if self._batch:
+            self._futures.append(self.pool.submit(self._upload_batch, self._batch))
+            self._batch = []
+            self._batch_size_bytes = 0
+    
+    def _stored(self, key: str, digest: str, nbytes: int, kind: str):
+        with self._lock:
+            self.manifest[key] = digest
+            self._by_hash[digest] = key
+            self._manifest_dirty = True
+            self.counts[kind] += 1
+            self.counts['bytes'] += nbytes
+            if kind != 'copied':
+                for duplicate_key, *_ in self._waiting.pop(digest, []):
+                    self._futures.append(self.pool.submit(self._copy, key, duplicate_key, digest))
+    
+    def _failed(self, key: str, error: Exception, digest: Optional[str] = None):
+        logger.error(f"Upload of {key} to s3://{self.bucket} failed: {error}")
+        with self._lock:
+            self.counts['failed'] += 1
+            # Objects waiting to copy this content have to be uploaded themselves
+            waiting = self._waiting.pop(digest, []) if digest else []
+            if waiting:
+                first, *rest = waiting
+                self._enqueue(*first)
+                self._waiting[digest].extend(rest)
+    
+    def _upload_batch(self, batch: List[Tuple[str, bytes, Optional[str], str]]):
+        for key, data, content_type, digest in batch:
+            extra = {'ContentType': content_type} if content_type else {}
+            try:
+                self.client.put_object(Bucket=self.bucket, Key=self._key(key), Body=data,
+                                       Metadata={'sha256': digest}, **extra)
+            except Exception as e:
+                self._failed(key, e, digest)
+            else:
+                self._stored(key, digest, len(data), 'uploaded')
+    
+    def _upload_large(self, key: str, body, content_type: Optional[str], digest: str, size: int):
+        extra = {'Metadata': {'sha256': digest}}
+        if content_type:
+            extra['ContentType'] = content_type
+        try:
+            if isinstance(body, Path):
+                self.client.upload_file(str(body), self.bucket, self._key(key),
+                                        ExtraArgs=extra, Config=self.transfer_config)
+            else:
+                self.client.upload_fileobj(io.BytesIO(body), self.bucket, self._key(key),
+                                           ExtraArgs=extra, Config=self.transfer_config)
+        except Exception as e:
+            self._failed(key, e, digest)
+        else:
+            self._stored(key, digest, size, 'multipart')
+    
+    def _copy(self, source_key: str, key: str, digest: str):
+        try:
+            self.client.copy_object(Bucket=self.bucket, Key=self._key(key),
+                                    CopySource={'Bucket': self.bucket, 'Key': self._key(source_key)})
+        except Exception as e:
+            self._failed(key, e)
+        else:
+            self._stored(key, digest, 0, 'copied')
+    
+    def flush(self):
+        # Finished uploads can queue more work (copies of duplicates, retries)
+        while True:
+            with self._lock:
+                self._submit_batch()
+                futures, self._futures = self._futures, []
+            if not futures:
+                break
+            for future in futures:
+                future.result()
+        with self._lock:
+            if not self._manifest_dirty:
+                return
+            manifest = json.dumps(self.manifest, sort_keys=True).encode('utf-8')
+            self._manifest_dirty = False
+        self.client.put_object(Bucket=self.bucket, Key=self._key(STORAGE_MANIFEST_KEY), Body=manifest,
+                               ContentType='application/json')
+    
+    def close(self):
+        self.flush()
+        self.pool.shutdown()
+    
+    def stats(self) -> Dict:
+        return {'backend': 's3', 'bucket': self.bucket, 'prefix': self.prefix, **self.counts}
+
+
+def open_storage(root: Path, url: Optional[str] = None, **options) -> Storage:
+    """Storage for --storage: local by default, or s3://bucket/prefix"""
+    if not url:
+        return Storage(root)
+    if url.startswith('s3://'):
+        if not BOTO3_AVAILABLE:
+            raise ValueError("S3 storage requires boto3 (pip install boto3)")
+        return S3Storage(root, url, **options)
+    raise ValueError(f"Unsupported storage URL: {url} (expected s3://bucket/prefix)")
+
+
+# ---------------------------------------------------------------------------
+# Link validation (--check-links)
+# ---------------------------------------------------------------------------
+
+LINK_GRAPH_FILENAME = "link_graph.json"
+LINK_REPORT_FILENAME = "link_report.json"
+LINK_CACHE_FILENAME = "link_cache.json"
+MAX_REDIRECTS = 10
+# Referring pages listed per broken link or redirect in the report
+REPORT_SOURCES = 20
+
+
+class LinkGraph:
+    """
+    Pages and the link targets they reference.
+    
+    URLs are interned to integers and each page's targets are kept as an
+    array of ids, so a crawl with many thousands of links stays small.
+    """
+    
+    def __init__(self):
+        self.urls: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.edges: Dict[int, array] = {}
+        self._lock = threading.Lock()
+    
+    def _intern(self, url: str) -> int:
+        url_id = self.ids.get(url)
+        if url_id is None:
+            url_id = self.ids[url] = len(self.urls)
+            self.urls.append(url)
+        return url_id
+    
+    def add_page(self, page_url: str, targets: Set[str]):
+        """Record (or replace) the link targets of a page"""
+        with self._lock:
+            source = self._intern(page_url)
+            self.edges[source] = array('I', sorted({self._intern(t) for t in targets}))
+    
+    def targets(self) -> List[str]:
+        """Every distinct link target"""
+        ids = set()
+        for target_ids in self.edges.values():
+            ids.update(target_ids)
+        return [self.urls[i] for i in sorted(ids)]
+    
+    def sources(self) -> Dict[str, List[str]]:
+        """Target URL -> pages linking to it"""
+        referrers: Dict[str, List[str]] = {}
+        for source, target_ids in self.edges.items():
+            for target in target_ids:
+                referrers.setdefault(self.urls[target], []).append(self.urls[source])
+        return referrers
+    
+    def to_dict(self) -> Dict:
+        return {'urls': self.urls, 'edges': {str(s): list(t) for s, t in self.edges.items()}}
+
+
+class LinkChecker:
+    """
+    Check link targets concurrently.
+    
+    Each URL gets a HEAD request; servers that reject HEAD (or answer it with
+    an error) get a GET for the first byte instead. Redirects are followed by
+    hand so the whole chain is reported. Results are cached by URL in a JSON
+    file and reused until they are older than `ttl` seconds. At most
+    `per_host` requests run against one host at a time.
+    """
+    
+    def __init__(self, session: requests.Session, cache_path: Optional[Path] = None,
+                 ttl: float = 86400.0, workers: int = 16, per_host: int = 4, timeout: float = 15.0):
+        self.session = session
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.timeout = timeout
+        self.cache: Dict[str, Dict] = {}
+        if cache_path and cache_path.exists():
+            self.cache = json.loads(cache_path.read_text(encoding='utf-8'))
+        self._host_slots: Dict[str, threading.Semaphore] = {}
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.cached = 0
+    
+    def _slot(self, url: str) -> threading.Semaphore:
+        host = urlparse(url).netloc
+        with self._lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.Semaphore(self.per_host)
+            return self._host_slots[host]
+    
+    def _request(self, method: str, url: str) -> requests.Response:
+        headers = {'Range': 'bytes=0-0'} if method == 'GET' else None
+        with self._slot(url):
+            response = self.session.request(method, url, headers=headers, allow_redirects=False,
+                                            stream=True, timeout=(min(10.0, self.timeout), self.timeout))
+            response.close()
+        return response
+    
+    def _follow(self, method: str, url: str) -> Dict:
+        """Request url, following redirects; returns status, final URL and chain"""
+        chain = []
+        current = url
+        for _ in range(MAX_REDIRECTS + 1):
+            response = self._request(method, current)
+            location = response.headers.get('Location')
+            if not (response.is_redirect and location):
+                return {'status': response.status_code, 'final_url': current, 'redirects': chain}
+            chain.append({'url': current, 'status': response.status_code})
+            current = urljoin(current, location)
+        return {'status': None, 'final_url': current, 'redirects': chain,
+                'error': f"More than {MAX_REDIRECTS} redirects"}
+    
+    def check(self, url: str) -> Dict:
+        """Check one URL (no cache)"""
+        result: Dict = {}
+        try:
+            result = self._follow('HEAD', url)
+        except requests.RequestException as e:
+            result = {'status': None, 'error': str(e)}
+        if result.get('status') is None or result['status'] >= 400:
+            try:
+                result = self._follow('GET', url)
+            except requests.RequestException as e:
+                result.setdefault('error', str(e))
+        result['ok'] = result.get('status') is not None and result['status'] < 400
+        result['checked_at'] = time.time()
+        return result
+    
+    def check_all(self, urls: List[str]) -> Dict[str, Dict]:
+        """Check URLs concurrently, reusing fresh cache entries. Returns URL -> result"""
+        now = time.time()
+        results = {}
+        pending = []
+        for url in urls:
+            entry = self.cache.get(url)
+            if entry and now - entry['checked_at'] < self.ttl:
+                results[url] = entry
+                self.cached += 1
+            else:
+                pending.append(url)
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for url, result in zip(pending, pool.map(self.check, pending)):
+                results[url] = self.cache[url] = result
+                self.checked += 1
+        
+        if self.cache_path:
+            expired = [url for url, entry in self.cache.items() if now - entry['checked_at'] >= self.ttl]
+            for url in expired:
+                if url not in results:
+                    del self.cache[url]
+            _write_json_atomic(self.cache_path, self.cache)
+        return results
+
+
+def build_link_report(graph: LinkGraph, results: Dict[str, Dict], is_internal) -> Dict:
+    """Broken links and redirect chains, each with the pages that link to them"""
+    referrers = graph.sources()
+    broken, redirects = [], []
+    for url, result in results.items():
+        pages = referrers.get(url, [])
+        entry = {'url': url, 'internal': is_internal(url), 'status': result.get('status'),
+                 'page_count': len(pages), 'pages': pages[:REPORT_SOURCES]}
+        if not result['ok']:
+            broken.append({**entry, 'error': result.get('error')})
+        if result.get('redirects'):
+            redirects.append({**entry, 'final_url': result.get('final_url'),
+                              'chain': [hop['url'] for hop in result['redirects']] + [result.get('final_url')],
+                              'hops': len(result['redirects'])})
+    broken.sort(key=lambda e: (-e['page_count'], e['url']))
+    redirects.sort(key=lambda e: (-e['hops'], -e['page_count'], e['url']))
+    return {
+        'checked_at': datetime.now().isoformat(),
+        'pages': len(graph.edges),
+        'targets': len(results),
+        'internal_targets': sum(1 for url in results if is_internal(url)),
+        'broken_count': len(broken),
+        'redirect_count': len(redirects),
+        'broken': broken,
+        'redirects': redirects,
+    }
 
 
 class WebsiteScraper:
@@ -64,7 +2171,19 @@ class WebsiteScraper:
     Comprehensive website scraper that handles both static and JavaScript-rendered sites.
     """
     
-    def __init__(self, base_url: str, output_dir: str = "scraped_content", request_delay: float = 1.0):
+    def __init__(self, base_url: str, output_dir: str = "scraped_content", request_delay: float = 1.0,
+                 srcset_policy: str = 'largest', asset_host_policy: Optional[AssetHostPolicy] = None,
+                 optimize_images: bool = False, image_formats: Optional[List[str]] = None,
+                 image_widths: Optional[List[int]] = None, workers: Optional[int] = None,
+                 search_index: bool = True, browser_address: Optional[str] = None,
+                 pool_size: int = 10, asset_concurrency: int = 1, http2: bool = False,
+                 dns_cache_ttl: Optional[float] = None, render_cache: bool = True,
+                 save_to_disk: bool = True, profile: bool = False,
+                 budget: Optional[CrawlBudget] = None, detect_boilerplate: bool = True,
+                 cassette: Optional[Cassette] = None, page_timeout: float = 60.0,
+                 asset_timeout: float = 120.0, check_links: bool = False, link_workers: int = 16,
+                 link_cache_ttl: float = 86400.0, storage: Optional[Storage] = None,
+                 platform_api: bool = True):
         """
         Initialize the scraper.
         
@@ -72,7 +2191,49 @@ class WebsiteScraper:
             base_url: The base URL of the website to scrape
             output_dir: Directory to save scraped content
             request_delay: Delay between requests in seconds (rate limiting)
+            srcset_policy: Which responsive image variants to download
+                (see select_srcset_candidates); ValueError if unrecognised
+            asset_host_policy: External hosts assets may be fetched from
+                (defaults to AssetHostPolicy.for_site with DEFAULT_ASSET_HOSTS)
+            optimize_images: Transcode downloaded images in a process pool (requires Pillow)
+            image_formats: Output formats for optimized images (default: webp)
+            image_widths: Resized variant widths in pixels (default: 480, 960, 1600)
+            workers: Process pool size for image optimisation (default: CPU count)
+            search_index: Write full page text to an FTS5 index in output_dir
+            browser_address: host:port of an already running Chrome with remote
+                debugging enabled (see the browser subcommand); attaching skips
+                browser cold start
+            pool_size: Keep-alive connections per host
+            asset_concurrency: Assets downloaded in parallel per page
+            http2: Use httpx with HTTP/2 multiplexing (requires httpx[http2])
+            dns_cache_ttl: Cache DNS lookups for this many seconds (None: off).
+                Replaces socket.getaddrinfo for the whole process
+            render_cache: Reuse earlier Selenium renders of pages whose raw HTML
+                is unchanged (stored in output_dir/render_cache)
+            save_to_disk: Write pages, assets, indexes and the summary to
+                output_dir. When False the scraper only streams page records
+                (see iter_pages) and assets are listed but not downloaded.
+            profile: Sample stacks and track allocations per crawl stage,
+                written to output_dir as profile.collapsed/profile_report.txt
+            budget: Time/byte limits; renders and media are dropped as they
+                tighten and the crawl stops cleanly when one runs out
+            detect_boilerplate: Learn the site template across pages and keep
+                it out of text_content and the search index
+            cassette: Record every HTTP response (and render) to a Cassette,
+                or serve them from one with no network or browser
+            page_timeout: Total seconds a page fetch or browser page load may take
+            asset_timeout: Total seconds an asset download may take
+            check_links: Record every link target (internal and external) in a
+                LinkGraph and check them all once the crawl is done, writing
+                link_report.json
+            link_workers: Concurrent link checks
+            link_cache_ttl: Seconds a cached link check result stays valid
+            storage: Where pages, assets and the summary are written
+                (default: Storage(output_dir); see S3Storage)
+            platform_api: On Squarespace sites, read page content from the
+                ?format=json endpoint over plain HTTP instead of rendering
         """
+        validate_srcset_policy(srcset_policy)
         self.base_url = base_url.rstrip('/')
         self.domain = urlparse(base_url).netloc
         self.output_dir = Path(output_dir)
@@ -80,21 +2241,124 @@ class WebsiteScraper:
         self.failed_urls: Set[str] = set()
         self.assets_downloaded: Set[str] = set()
         self.pages_data: List[Dict] = []
-        self.request_delay = request_delay
+        self._page_positions: Dict[str, int] = {}
+        self.cassette = cassette
+        # Replays run at disk speed; there is no server to be polite to
+        self.request_delay = 0 if cassette and cassette.replaying else request_delay
+        self.srcset_policy = srcset_policy
+        self.save_to_disk = save_to_disk
+        self.storage = storage or Storage(self.output_dir)
+        self.asset_host_policy = asset_host_policy or AssetHostPolicy.for_site(self.domain)
+        
+        # Assets discovered while processing other assets (e.g. stylesheets)
+        self.asset_queue: deque = deque()
+        # Stylesheet content hash -> raw references, so shared CSS is tokenized once
+        self.parsed_stylesheets: Dict[str, List[Tuple[str, str]]] = {}
+        self.scanned_stylesheet_urls: Set[str] = set()
+        # Asset URL -> {'path': ..., 'type': ...} (paths relative to output_dir)
+        self.asset_index: Dict[str, Dict] = {}
+        # Output-relative asset path / page filename -> URL saved there
+        self._asset_owners: Dict[str, str] = {}
+        self._asset_owners_lock = threading.Lock()
+        self._page_owners: Dict[str, str] = {}
+        # asset_index.json of an earlier run: a file already on disk is only reused
+        # for the URL that index says it was fetched from
+        self._saved_assets: Dict[str, Dict] = {}
+        index_path = self.output_dir / "asset_index.json"
+        if save_to_disk and index_path.exists():
+            try:
+                self._saved_assets = json.loads(index_path.read_text(encoding='utf-8'))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable {index_path}: {e}")
+        for asset_url, entry in self._saved_assets.items():
+            self._asset_owners.setdefault(entry['path'], asset_url)
+        
+        # Post-download image optimisation
+        self.image_formats = image_formats or ['webp']
+        self.image_widths = image_widths or [480, 960, 1600]
+        self.image_pool: Optional[ProcessPoolExecutor] = None
+        self.image_jobs: Dict[str, Future] = {}
+        if optimize_images:
+            if PIL_AVAILABLE:
+                self.image_pool = ProcessPoolExecutor(max_workers=workers)
+            else:
+                logger.warning("Image optimisation requested but Pillow is not installed (pip install pillow)")
+        
+        self.profiler = CrawlProfiler() if profile else None
+        self.page_timeout = page_timeout
+        self.asset_timeout = asset_timeout
+        self.latency = LatencyTracker()
+        self.budget = budget
+        
+        # Hosting platform, detected from the base URL by iter_pages
+        self.platform: Optional[str] = None
+        self.platform_api = platform_api
+        self.platform_pages = {'json': 0, 'fallback': 0}
+        
+        # Every link target seen, checked after the crawl
+        self.link_graph = LinkGraph() if check_links else None
+        self.link_workers = link_workers
+        self.link_cache_ttl = link_cache_ttl
+        self.link_report: Optional[Dict] = None
+        
+        # Site template learned across pages; block ids per saved page let
+        # pages saved before the template was known be re-split at the end
+        self.templates = TemplateDetector() if detect_boilerplate else None
+        self._page_block_ids: Dict[str, List[str]] = {}
+        
+        # Assets referenced by the page currently being processed
+        self._page_assets: List[Tuple[str, str]] = []
         
         # Create output directories
-        self._create_directories()
+        if save_to_disk:
+            self._create_directories()
         
-        # Session for connection pooling
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        })
+        # Full-text index, written incrementally as pages are saved
+        self.search_index: Optional[SearchIndex] = None
+        if search_index and save_to_disk:
+            try:
+                self.search_index = SearchIndex(self.output_dir / SEARCH_INDEX_FILENAME)
+            except sqlite3.Error as e:
+                logger.warning(f"Search index disabled: {e}")
+        
+        # Transport: one pooled session per host sharing a TLS context
+        self.pool_size = pool_size
+        self.asset_concurrency = max(1, asset_concurrency)
+        self.http2 = http2 and HTTP2_AVAILABLE and cassette is None
+        if http2 and not HTTP2_AVAILABLE:
+            logger.warning("HTTP/2 requested but httpx[http2] is not installed; using HTTP/1.1")
+        elif http2 and cassette is not None:
+            logger.warning("Cassettes record the requests transport; HTTP/2 disabled")
+        self.http_versions: Dict[str, int] = {}
+        # Requests and new connections per host made through httpx clients,
+        # which (unlike urllib3 pools) keep no counters of their own
+        self._httpx_pool_stats: Dict[str, Dict[str, int]] = {}
+        self._httpx_stats_lock = threading.Lock()
+        self.dns_cache = install_dns_cache(dns_cache_ttl) if dns_cache_ttl else None
+        self.tls_context = create_tls_context()
+        self._session_lock = threading.Lock()
         
-        # Selenium driver (if available)
+        # Session for connection pooling (pages); asset hosts get their own
+        self.session = self._new_session()
+        self.asset_sessions: Dict[str, requests.Session] = {}
+        
+        self.render_cache = RenderCache(self.output_dir / RENDER_CACHE_DIR) if render_cache and save_to_disk else None
+        
+        # Selenium driver, created on first render by _get_driver
         self.driver = None
-        if SELENIUM_AVAILABLE:
-            self._init_selenium()
+        self.browser_address = browser_address
+        self._driver_failed = False
+    
+    def _stage(self, name: str):
+        """Profiler stage context (no-op unless profiling)"""
+        return self.profiler.stage(name) if self.profiler else nullcontext()
+    
+    def _budget_allows(self, kind: str, url: str) -> bool:
+        return self.budget is None or self.budget.allows(kind, url)
+    
+    def _charge(self, url: str, nbytes: int):
+        if self.budget:
+            self.budget.charge(url, nbytes)
     
     def _create_directories(self):
         """Create output directory structure"""
@@ -108,10 +2372,133 @@ class WebsiteScraper:
         (self.output_dir / "assets" / "videos").mkdir(exist_ok=True)
         (self.output_dir / "assets" / "other").mkdir(exist_ok=True)
     
+    def _new_session(self, allow_http2: bool = True) -> requests.Session:
+        """
+        Create an HTTP session with the scraper's default headers.
+        
+        With http2 enabled (and allowed) this is an httpx.Client, which supports
+        the same get()/raise_for_status()/content calls the scraper relies on.
+        """
+        if self.http2 and allow_http2:
+            import httpx
+            return httpx.Client(
+                http2=True,
+                verify=self.tls_context,
+                limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                headers={'User-Agent': USER_AGENT},
+                follow_redirects=True,
+                event_hooks={'request': [self._trace_httpx_connections],
+                             'response': [self._record_http_version]},
+            )
+        
+        session = requests.Session()
+        session.headers.update({'User-Agent': USER_AGENT})
+        adapter = PooledHTTPAdapter(self.tls_context, pool_maxsize=self.pool_size)
+        if self.cassette:
+            adapter = CassetteAdapter(self.cassette, None if self.cassette.replaying else adapter)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.hooks['response'].append(self._record_http_version)
+        return session
+    
+    def _record_http_version(self, response, *args, **kwargs):
+        """Response hook counting responses per protocol version"""
+        version = getattr(response, 'http_version', None)
+        if version is None:
+            raw_version = getattr(getattr(response, 'raw', None), 'version', None)
+            version = {10: 'HTTP/1.0', 11: 'HTTP/1.1', 20: 'HTTP/2'}.get(raw_version, 'unknown')
+        self.http_versions[version] = self.http_versions.get(version, 0) + 1
+    
+    def _count_httpx(self, host: str, key: str):
+        with self._httpx_stats_lock:
+            host_stats = self._httpx_pool_stats.setdefault(host, {'requests': 0, 'connections': 0})
+            host_stats[key] += 1
+    
+    def _trace_httpx_connections(self, request):
+        """Request hook counting httpx requests, and the connections opened for them, per host"""
+        host = request.url.host
+        self._count_httpx(host, 'requests')
+        
+        def trace(event_name, info):
+            if event_name == 'connection.connect_tcp.complete':
+                self._count_httpx(host, 'connections')
+        
+        request.extensions['trace'] = trace
+    
+    def _session_for(self, url: str) -> requests.Session:
+        """Return the session (and so the keep-alive pool) for the URL's host"""
+        host = urlparse(url).netloc
+        if self._is_same_domain(url):
+            return self.session
+        with self._session_lock:
+            session = self.asset_sessions.get(host)
+            if session is None:
+                session = self._new_session()
+                self.asset_sessions[host] = session
+        return session
+    
+    def _transport_stats(self) -> Dict:
+        """Connection reuse, DNS and TLS statistics for the crawl summary"""
+        hosts: Dict[str, Dict] = {}
+        for session in [self.session, *self.asset_sessions.values()]:
+            adapters = getattr(session, 'adapters', {})
+            for adapter in {id(a): a for a in adapters.values()}.values():
+                adapter = getattr(adapter, 'upstream', adapter)
+                if isinstance(adapter, PooledHTTPAdapter):
+                    for host, counts in adapter.pool_stats().items():
+                        totals = hosts.setdefault(host, {'requests': 0, 'connections': 0})
+                        totals['requests'] += counts['requests']
+                        totals['connections'] += counts['connections']
+        with self._httpx_stats_lock:
+            for host, counts in self._httpx_pool_stats.items():
+                totals = hosts.setdefault(host, {'requests': 0, 'connections': 0})
+                totals['requests'] += counts['requests']
+                totals['connections'] += counts['connections']
+        
+        for counts in hosts.values():
+            requests_made = counts['requests']
+            counts['reuse_ratio'] = round(1 - counts['connections'] / requests_made, 3) if requests_made else None
+        total_requests = sum(c['requests'] for c in hosts.values())
+        total_connections = sum(c['connections'] for c in hosts.values())
+        
+        return {
+            'http2': self.http2,
+            'http_versions': self.http_versions,
+            'requests': total_requests or sum(self.http_versions.values()),
+            'connections': total_connections,
+            'reuse_ratio': round(1 - total_connections / total_requests, 3) if total_requests else None,
+            'hosts': hosts,
+            'tls_handshakes': self.tls_context.handshakes,
+            'tls_sessions_resumed': self.tls_context.resumed,
+            'dns': self.dns_cache.stats() if self.dns_cache else None,
+        }
+    
+    def selenium_available(self) -> bool:
+        """Whether JavaScript rendering can be used (without starting a browser)"""
+        if self.cassette and self.cassette.replaying:
+            return self.cassette.has_renders()
+        return SELENIUM_AVAILABLE and not self._driver_failed
+    
+    def _get_driver(self):
+        """Return the WebDriver, starting or attaching to Chrome on first use"""
+        if self.driver is None and self.selenium_available():
+            self._init_selenium()
+            if self.driver is None:
+                self._driver_failed = True
+        return self.driver
+    
     def _init_selenium(self):
         """Initialize Selenium WebDriver for JavaScript-rendered content"""
         try:
+            _import_selenium()
             chrome_options = Options()
+            if self.browser_address:
+                # Attach to a warm browser; launch flags belong to that process
+                chrome_options.debugger_address = self.browser_address
+                self.driver = webdriver.Chrome(options=chrome_options, service=self._chromedriver_service())
+                self.driver.set_page_load_timeout(self.page_timeout)
+                logger.info(f"Attached to running browser at {self.browser_address}")
+                return
             chrome_options.add_argument('--headless')
             chrome_options.add_argument('--no-sandbox')
             chrome_options.add_argument('--disable-dev-shm-usage')
@@ -119,13 +2506,29 @@ class WebsiteScraper:
             chrome_options.add_argument('--window-size=1920,1080')
             chrome_options.add_argument('user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
             
-            self.driver = webdriver.Chrome(options=chrome_options)
+            self.driver = webdriver.Chrome(options=chrome_options, service=self._chromedriver_service())
+            self.driver.set_page_load_timeout(self.page_timeout)
             logger.info("Selenium WebDriver initialized successfully")
         except Exception as e:
             logger.warning(f"Could not initialize Selenium: {e}")
             logger.warning("Continuing without JavaScript rendering support")
             self.driver = None
     
+    @staticmethod
+    def _chromedriver_service():
+        """
+        chromedriver in its own process group (session), so the render
+        watchdog can kill it together with the Chrome it launched.
+        """
+        service = None
+        if os.name == 'posix':
+            try:
+                service = Service(popen_kw={'start_new_session': True})
+                service.own_process_group = True
+            except TypeError:
+                pass  # Selenium < 4.11 has no popen_kw
+        return service or Service()
+    
     def _normalize_url(self, url: str) -> str:
         """Normalize URL to avoid duplicates"""
         parsed = urlparse(url)
@@ -148,24 +2551,119 @@ class WebsiteScraper:
     
     def _should_download_external_asset(self, url: str) -> bool:
         """Check if external asset should be downloaded (e.g., CDN assets)"""
-        parsed = urlparse(url)
-        # Add your CDN domains here if needed
-        cdn_domains = [
-            'static.wixstatic.com',
-            'static.parastorage.com',
-            'video.wixstatic.com',
-            'siteassets.parastorage.com',
-            'viewer-assets.parastorage.com',
-            # Add more CDN domains as needed
-        ]
-        return parsed.netloc in cdn_domains
+        return self.asset_host_policy.allows(urlparse(url).netloc)
+    
+    def _asset_host_allowed(self, url: str) -> bool:
+        """Whether an asset's host may be downloaded from: the site itself or an allowed CDN"""
+        return self._is_same_domain(url) or self._should_download_external_asset(url)
+    
+    def _fetch(self, url: str, deadline: float, session=None, headers: Optional[Dict] = None):
+        """
+        GET a URL within a total deadline (seconds).
+        
+        timeout= only bounds single socket operations, so a server that drips
+        bytes can hold a request open indefinitely. The body is streamed instead
+        and the request abandoned (DeadlineExceeded) once the deadline passes;
+        a server that goes completely silent is cut off by the read timeout.
+        """
+        session = session or self._session_for(url)
+        started = time.monotonic()
+        expires = started + deadline
+        
+        try:
+            if self.http2:
+                with session.stream('GET', url, headers=headers, timeout=min(30.0, deadline)) as response:
+                    response._content = read_within(response.iter_bytes(), expires, url)
+                return response
+            _fetch_deadline.expires = expires
+            try:
+                response = session.get(url, headers=headers, stream=True,
+                                       timeout=(min(10.0, deadline), min(30.0, deadline)))
+            finally:
+                _fetch_deadline.expires = None
+            if response._content_consumed:
+                # Already read (within the deadline) by a transport adapter (cassettes)
+                return response
+            try:
+                response._content = read_within(_body_chunks(response), expires, url)
+            except Exception:
+                response.close()
+                raise
+            response._content_consumed = True
+            return response
+        except DeadlineExceeded:
+            self.latency.deadline_exceeded += 1
+            raise
+        finally:
+            self.latency.record(urlparse(url).netloc, time.monotonic() - started)
+    
+    def _kill_render(self, driver, url: str, killed: threading.Event):
+        """
+        Watchdog: stop a browser session stuck on a page so the crawl can go on.
+        
+        killed is set first, so the render sees its session is gone however
+        long the shutdown takes. The session is ended cleanly on a helper
+        thread. If that hangs, chromedriver's process group is killed, which
+        takes its Chrome with it. An attached (--browser-address) browser is
+        left running, but its stuck tab is replaced so the next session does
+        not reconnect to it.
+        """
+        killed.set()
+        logger.error(f"Render of {url} exceeded {self.page_timeout + RENDER_WATCHDOG_GRACE:g}s; killing the browser session")
+        self.latency.hung_renders += 1
+        service = getattr(driver, 'service', None)
+        
+        if self.browser_address:
+            try:
+                reset_browser_tabs(self.browser_address)
+            except Exception as e:
+                logger.warning(f"Could not reset the tabs of the browser at {self.browser_address}: {e}")
+            # quit() would close the warm browser; only end chromedriver
+            end_session = service.stop if service else None
+        else:
+            end_session = driver.quit
+        if end_session:
+            ender = threading.Thread(target=end_session, name="render-quit", daemon=True)
+            ender.start()
+            ender.join(RENDER_QUIT_TIMEOUT)
+        
+        process = getattr(service, 'process', None)
+        if process is None:
+            return
+        try:
+            if getattr(service, 'own_process_group', False):
+                # Also reaches Chrome when chromedriver itself already exited
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except (ProcessLookupError, PermissionError):
+            pass  # Everything already exited after a clean quit
     
-    def _get_page_content(self, url: str, use_selenium: bool = False) -> Optional[str]:
-        """Fetch page content, optionally using Selenium for JS rendering"""
-        if use_selenium and self.driver:
+    def _get_page_content(self, url: str, use_selenium: bool = False) -> Tuple[Optional[bytes], str]:
+        """
+        Fetch page content, optionally using Selenium for JS rendering.
+        
+        Returns:
+            (body, encoding); body is None if the page could not be fetched.
+            Rendered pages are UTF-8.
+        """
+        if use_selenium and self._get_driver():
+            driver = self.driver
+            started = time.monotonic()
+            killed = threading.Event()
+            watchdog = threading.Timer(self.page_timeout + RENDER_WATCHDOG_GRACE, self._kill_render,
+                                       args=(driver, url, killed))
+            watchdog.daemon = True
+            watchdog.start()
             try:
-                logger.info(f"Fetching with Selenium: {url}")
-                self.driver.get(url)
+                logger.debug("Fetching with Selenium: %s", url)
+                try:
+                    self.driver.get(url)
+                except TimeoutException:
+                    # Keep whatever loaded before the page-load timeout
+                    logger.warning(f"Page load timed out after {self.page_timeout:g}s: {url}")
+                    self.latency.deadline_exceeded += 1
+                    self.driver.execute_script("window.stop();")
                 
                 # Wait for page to load
                 time.sleep(3)
@@ -187,83 +2685,246 @@ class WebsiteScraper:
                 # Wait for any remaining dynamic content
                 time.sleep(2)
                 
-                return self.driver.page_source
+                page_source = self.driver.page_source
+                body = page_source.encode('utf-8')
+                self._charge(url, len(body))
+                if self.cassette:
+                    self.cassette.put_render(url, page_source)
+                return body, 'utf-8'
             except Exception as e:
                 logger.error(f"Selenium error for {url}: {e}")
-                return None
+                return None, 'utf-8'
+            finally:
+                watchdog.cancel()
+                # A kill already under way has to finish before the session is judged
+                watchdog.join()
+                if killed.is_set() and self.driver is driver:
+                    # The watchdog killed this session; start a fresh one next time
+                    self.driver = None
+                self.latency.record('render', time.monotonic() - started)
         
         try:
-            logger.info(f"Fetching: {url}")
-            response = self.session.get(url, timeout=30)
+            logger.debug("Fetching: %s", url)
+            response = self._fetch(url, self.page_timeout, session=self.session)
+            self._charge(url, len(response.content))
             response.raise_for_status()
             time.sleep(self.request_delay)  # Rate limiting
-            return response.text
+            return response.content, detect_html_encoding(response.content, response.headers.get('Content-Type'))
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
-            return None
+            return None, 'utf-8'
+    
+    def _render_page(self, url: str, prefetched: Optional[Tuple[bytes, str]] = None
+                     ) -> Tuple[Optional[bytes], str, bool]:
+        """
+        Get the rendered HTML for a page, reusing the render cache when possible.
+        
+        The raw HTTP response is fetched first (cheap, and skipped when it is
+        prefetched) and fingerprinted; Chrome is only used when no render
+        exists for that fingerprint.
+        
+        Returns:
+            (html, encoding, driver_used). html falls back to the raw response
+            when rendering is unavailable.
+        """
+        if self.cassette and self.cassette.replaying:
+            render = self.cassette.get_render(url)
+            return (render.encode('utf-8') if render is not None else None), 'utf-8', False
+        
+        if self.render_cache is None:
+            if self._get_driver():
+                return (*self._get_page_content(url, use_selenium=True), True)
+            return None, 'utf-8', False
+        
+        raw_html, raw_encoding, fingerprint = None, 'utf-8', None
+        try:
+            if prefetched:
+                raw_html, raw_encoding = prefetched
+            else:
+                response = self._fetch(url, self.page_timeout, session=self.session)
+                self._charge(url, len(response.content))
+                response.raise_for_status()
+                time.sleep(self.request_delay)
+                raw_html = response.content
+                raw_encoding = detect_html_encoding(raw_html, response.headers.get('Content-Type'))
+            fingerprint = render_fingerprint(raw_html)
+            cached = self.render_cache.get(url, fingerprint)
+            if cached is not None:
+                logger.debug("Using cached render: %s", url)
+                if self.cassette:
+                    self.cassette.put_render(url, cached)
+                return cached.encode('utf-8'), 'utf-8', False
+        except Exception as e:
+            logger.debug(f"Could not fingerprint {url}: {e}")
+        
+        if not self._get_driver():
+            return raw_html, raw_encoding, False
+        html_content, _ = self._get_page_content(url, use_selenium=True)
+        if html_content and fingerprint:
+            self.render_cache.put(url, fingerprint, html_content.decode('utf-8'))
+        if html_content is None:
+            return raw_html, raw_encoding, False
+        return html_content, 'utf-8', True
     
-    def _download_asset(self, url: str, asset_type: str = "other") -> Optional[str]:
+    def _download_asset(self, url: str, asset_type: str = "other", base: Optional[str] = None) -> Optional[str]:
         """Download an asset (image, CSS, JS, etc.) and return local path"""
+        # Handle relative and scheme-relative URLs
+        if not url.startswith(('http://', 'https://')):
+            url = resolve_url(url, base or self.base_url)
+        
         if url in self.assets_downloaded:
-            return None
+            entry = self.asset_index.get(url)
+            return entry['path'] if entry else None
         
         try:
-            # Handle relative URLs
-            if not url.startswith(('http://', 'https://')):
-                url = urljoin(self.base_url, url)
-            
             # Skip external assets unless they're from known CDNs
-            if not self._is_same_domain(url) and not self._should_download_external_asset(url):
+            if not self._asset_host_allowed(url):
                 return None
             
             parsed = urlparse(url)
-            filename = os.path.basename(parsed.path) or f"asset_{hash(url)}"
-            
             # Sanitize filename
-            filename = re.sub(r'[^\w\-_\.]', '_', filename)
+            filename = re.sub(r'[^\w\-_\.]', '_', os.path.basename(parsed.path))
             if not filename:
-                filename = f"asset_{hash(url)}"
+                filename = f"asset_{hashlib.sha1(url.encode()).hexdigest()[:8]}"
+            
+            # Variants served from one path (e.g. ?format=500w) need distinct files
+            if parsed.query:
+                stem, ext = os.path.splitext(filename)
+                filename = f"{stem}_{hashlib.sha1(parsed.query.encode()).hexdigest()[:8]}{ext}"
             
             # Determine asset type from extension
-            ext = os.path.splitext(filename)[1].lower()
-            if ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp', '.ico']:
-                asset_type = "images"
-            elif ext in ['.css']:
-                asset_type = "css"
-            elif ext in ['.js', '.mjs']:
-                asset_type = "js"
-            elif ext in ['.woff', '.woff2', '.ttf', '.otf', '.eot']:
-                asset_type = "fonts"
-            elif ext in ['.mp4', '.webm', '.mov', '.avi']:
-                asset_type = "videos"
+            asset_type = guess_asset_type(filename, asset_type)
             
-            filepath = self.output_dir / "assets" / asset_type / filename
+            # Same basename under different paths (/a/logo.png, /b/logo.png) must not share a file
+            with self._asset_owners_lock:
+                relative_path = claim_local_name(f"assets/{asset_type}/{filename}", url, self._asset_owners)
+            filepath = self.output_dir / relative_path
             
-            # Skip if already exists
-            if filepath.exists():
+            # Skip if an earlier run already saved this URL here
+            if filepath.exists() and self._saved_assets.get(url, {}).get('path') == relative_path:
+                if self.storage.remote:
+                    self.storage.put_file(relative_path, filepath)
                 self.assets_downloaded.add(url)
-                return str(filepath.relative_to(self.output_dir))
+                self.asset_index[url] = {'path': relative_path, 'type': asset_type}
+                if asset_type == "css":
+                    self._scan_stylesheet(url, filepath.read_bytes())
+                elif asset_type == "images":
+                    self._queue_image_optimization(url, relative_path)
+                return relative_path
+            
+            if not self._budget_allows(asset_type, url):
+                logger.debug("Budget: skipping %s asset %s", asset_type, url)
+                return None
             
-            logger.info(f"Downloading asset: {url}")
-            response = self.session.get(url, timeout=30)
+            logger.debug("Downloading asset: %s", url)
+            response = self._fetch(url, self.asset_timeout)
+            self._charge(url, len(response.content))
             response.raise_for_status()
             
-            filepath.write_bytes(response.content)
+            self.storage.put(relative_path, response.content, response.headers.get('Content-Type'))
             self.assets_downloaded.add(url)
+            self.asset_index[url] = {'path': relative_path, 'type': asset_type}
             time.sleep(self.request_delay)
             
-            return str(filepath.relative_to(self.output_dir))
+            if asset_type == "css":
+                self._scan_stylesheet(url, response.content)
+            elif asset_type == "images":
+                self._queue_image_optimization(url, relative_path)
+            
+            return relative_path
         except Exception as e:
             logger.error(f"Error downloading asset {url}: {e}")
             return None
     
-    def _extract_links(self, soup: BeautifulSoup, page_url: str, driver=None) -> Set[str]:
-        """Extract all links from a page"""
+    def _scan_stylesheet(self, css_url: str, content: bytes):
+        """Queue fonts, images and nested @imports referenced by a stylesheet"""
+        if css_url in self.scanned_stylesheet_urls:
+            return
+        self.scanned_stylesheet_urls.add(css_url)
+        
+        content_hash = hashlib.sha256(content).hexdigest()
+        references = self.parsed_stylesheets.get(content_hash)
+        if references is None:
+            css_text = content.decode('utf-8', errors='replace')
+            references = list(iter_css_references(css_text))
+            self.parsed_stylesheets[content_hash] = references
+        
+        for kind, ref in references:
+            # Relative references resolve against the stylesheet, not the page
+            asset_url = resolve_url(ref, css_url)
+            if kind == 'import':
+                self._queue_asset(asset_url, "css")
+            else:
+                self._queue_asset(asset_url, guess_asset_type(urlparse(asset_url).path))
+    
+    def _queue_image_optimization(self, url: str, relative_path: str):
+        """Hand a downloaded raster image to the optimisation pool"""
+        if self.image_pool is None or url in self.image_jobs:
+            return
+        if os.path.splitext(relative_path)[1].lower() not in OPTIMIZABLE_IMAGE_EXTENSIONS:
+            return
+        self.image_jobs[url] = self.image_pool.submit(
+            optimize_image, str(self.output_dir), relative_path, self.image_formats, self.image_widths
+        )
+    
+    def _collect_image_optimizations(self, wait: bool = False):
+        """Record finished optimisation results (dimensions, variants) in the asset index"""
+        for url, job in list(self.image_jobs.items()):
+            if not wait and not job.done():
+                continue
+            del self.image_jobs[url]
+            try:
+                self.asset_index[url].update(job.result())
+            except Exception as e:
+                logger.error(f"Error optimizing image {url}: {e}")
+                continue
+            if self.storage.remote:
+                for variant in self.asset_index[url]['variants']:
+                    self.storage.put_file(variant['path'], self.output_dir / variant['path'])
+    
+    def _queue_asset(self, url: str, asset_type: str = "other", base: Optional[str] = None):
+        """Queue an asset for download by _process_asset_queue"""
+        if not url.startswith(('http://', 'https://')):
+            url = resolve_url(url, base or self.base_url)
+        self._page_assets.append((url, asset_type))
+        if url not in self.assets_downloaded and self.save_to_disk:
+            self.asset_queue.append((url, asset_type))
+    
+    def _process_asset_queue(self):
+        """Download queued assets, including any they reference in turn"""
+        if self.asset_concurrency == 1:
+            while self.asset_queue:
+                url, asset_type = self.asset_queue.popleft()
+                self._download_asset(url, asset_type)
+            return
+        
+        with ThreadPoolExecutor(max_workers=self.asset_concurrency) as executor:
+            while self.asset_queue:
+                # Drain in batches; stylesheets in a batch may queue more work
+                batch = {}
+                while self.asset_queue:
+                    url, asset_type = self.asset_queue.popleft()
+                    if url not in self.assets_downloaded:
+                        batch.setdefault(url, asset_type)
+                list(executor.map(self._download_asset_in_worker, batch.items()))
+    
+    def _download_asset_in_worker(self, item: Tuple[str, str]) -> Optional[str]:
+        with self._stage('assets'):
+            return self._download_asset(*item)
+    
+    def _extract_links(self, soup: BeautifulSoup, page_url: str, driver=None,
+                       supplement: Optional[BeautifulSoup] = None) -> Set[str]:
+        """Extract all links from a page (and its supplement markup, see _process_page)"""
         links = set()
+        # Every http(s) target, off-domain included, for the link graph
+        targets = set()
         base_domain = self.domain.replace('www.', '')
         
         # Find all anchor tags
-        for tag in soup.find_all('a', href=True):
+        anchors = soup.find_all('a', href=True)
+        if supplement is not None:
+            anchors += supplement.find_all('a', href=True)
+        for tag in anchors:
             href = tag['href']
             if href.startswith(('javascript:', 'mailto:', 'tel:', '#', 'data:')):
                 continue
@@ -272,6 +2933,8 @@ class WebsiteScraper:
             normalized = self._normalize_url(full_url)
             
             parsed = urlparse(normalized)
+            if parsed.scheme in ('http', 'https'):
+                targets.add(normalized)
             parsed_domain = parsed.netloc.replace('www.', '')
             
             if parsed_domain == base_domain or parsed.netloc == '':
@@ -290,6 +2953,8 @@ class WebsiteScraper:
                             
                             parsed = urlparse(normalized)
                             parsed_domain = parsed.netloc.replace('www.', '')
+                            if parsed.scheme in ('http', 'https'):
+                                targets.add(normalized)
                             
                             if parsed_domain == base_domain or parsed.netloc == '':
                                 links.add(normalized)
@@ -298,21 +2963,31 @@ class WebsiteScraper:
             except Exception as e:
                 logger.debug(f"Error extracting links from rendered DOM: {e}")
         
+        if self.link_graph is not None:
+            self.link_graph.add_page(page_url, targets)
         return links
     
     def _extract_assets(self, soup: BeautifulSoup, page_url: str, driver=None):
-        """Extract and download all assets from a page"""
+        """Extract all assets from a page and queue them for download"""
+        # Responsive images: <picture> sources first, then plain <img>
+        handled_imgs = set()
+        for picture in soup.find_all('picture'):
+            for source in picture.find_all('source'):
+                if self.srcset_policy != 'all' and not media_matches(source.get('media')):
+                    continue
+                if self._queue_srcset(source, page_url) and self.srcset_policy != 'all':
+                    handled_imgs.update(id(img) for img in picture.find_all('img'))
+                    break
+        
         # Images
         for img in soup.find_all('img'):
-            for attr in ['src', 'data-src', 'data-original', 'data-lazy-src', 'srcset']:
+            if id(img) in handled_imgs:
+                continue
+            if self._queue_srcset(img, page_url) and self.srcset_policy != 'all':
+                continue
+            for attr in ['src', 'data-src', 'data-original', 'data-lazy-src']:
                 if img.get(attr):
-                    if attr == 'srcset':
-                        srcset = img[attr]
-                        urls = re.findall(r'([^\s,]+\.(?:jpg|jpeg|png|gif|webp|svg|ico))', srcset)
-                        for url in urls:
-                            self._download_asset(url.strip(), "images")
-                    else:
-                        self._download_asset(img[attr], "images")
+                    self._queue_asset(img[attr], "images", base=page_url)
         
         # CSS files
         for link in soup.find_all('link'):
@@ -322,55 +2997,71 @@ class WebsiteScraper:
                 if isinstance(rel, list):
                     rel = ' '.join(rel)
                 if 'stylesheet' in str(rel).lower():
-                    self._download_asset(href, "css")
+                    self._queue_asset(href, "css", base=page_url)
                 elif 'preload' in str(rel).lower() or 'prefetch' in str(rel).lower():
                     as_attr = link.get('as', '').lower()
                     if 'font' in as_attr:
-                        self._download_asset(href, "fonts")
+                        self._queue_asset(href, "fonts", base=page_url)
                     elif 'style' in as_attr:
-                        self._download_asset(href, "css")
+                        self._queue_asset(href, "css", base=page_url)
         
         # JavaScript files
         for script in soup.find_all('script'):
             src = script.get('src') or script.get('data-url')
             if src:
-                self._download_asset(src, "js")
+                self._queue_asset(src, "js", base=page_url)
         
         # Background images from inline styles
         for tag in soup.find_all(style=True):
             style = tag['style']
             urls = re.findall(r'url\(["\']?([^"\')]+)["\']?\)', style)
             for url in urls:
-                self._download_asset(url, "images")
+                self._queue_asset(url, "images", base=page_url)
         
-        # Extract from <style> tags
+        # Extract from <style> tags (including @import rules)
         for style_tag in soup.find_all('style'):
             if style_tag.string:
-                urls = re.findall(r'url\(["\']?([^"\')]+)["\']?\)', style_tag.string)
-                for url in urls:
-                    if any(ext in url.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.svg', '.webp']):
-                        self._download_asset(url, "images")
-                    elif '.woff' in url.lower() or '.ttf' in url.lower():
-                        self._download_asset(url, "fonts")
+                for kind, ref in iter_css_references(style_tag.string):
+                    asset_url = resolve_url(ref, page_url)
+                    if kind == 'import':
+                        self._queue_asset(asset_url, "css")
+                    else:
+                        self._queue_asset(asset_url, guess_asset_type(urlparse(asset_url).path))
+        
+        # Social preview images and JSON-LD image/logo references
+        for meta in soup.find_all('meta', content=True):
+            key = (meta.get('property') or meta.get('name') or '').lower()
+            if key in ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image'):
+                self._queue_asset(meta['content'], "images", base=page_url)
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                data = json.loads(script.string or '')
+            except ValueError:
+                continue
+            for url in _iter_structured_data_images(data):
+                self._queue_asset(url, "images", base=page_url)
         
         # Video sources
         for video in soup.find_all('video'):
             if video.get('src'):
-                self._download_asset(video['src'], "videos")
+                self._queue_asset(video['src'], "videos", base=page_url)
             for source in video.find_all('source', src=True):
-                self._download_asset(source['src'], "videos")
+                self._queue_asset(source['src'], "videos", base=page_url)
         
         # Extract assets from rendered DOM if driver is available
         if driver:
             try:
-                # Images from rendered DOM
+                # Images from rendered DOM (currentSrc is the variant the browser chose)
+                img_attrs = ['src', 'data-src', 'data-original', 'data-lazy-src']
+                if self.srcset_policy == 'sizes':
+                    img_attrs.insert(0, 'currentSrc')
                 img_elements = driver.find_elements(By.TAG_NAME, "img")
                 for elem in img_elements:
                     try:
-                        for attr in ['src', 'data-src', 'data-original', 'data-lazy-src']:
+                        for attr in img_attrs:
                             src = elem.get_attribute(attr)
                             if src:
-                                self._download_asset(src, "images")
+                                self._queue_asset(src, "images")
                                 break
                     except:
                         continue
@@ -384,9 +3075,9 @@ class WebsiteScraper:
                         as_attr = elem.get_attribute('as') or ''
                         if href:
                             if 'stylesheet' in rel.lower():
-                                self._download_asset(href, "css")
+                                self._queue_asset(href, "css")
                             elif 'preload' in rel.lower() and 'font' in as_attr.lower():
-                                self._download_asset(href, "fonts")
+                                self._queue_asset(href, "fonts")
                     except:
                         continue
                 
@@ -396,14 +3087,24 @@ class WebsiteScraper:
                     try:
                         src = elem.get_attribute('src')
                         if src:
-                            self._download_asset(src, "js")
+                            self._queue_asset(src, "js")
                     except:
                         continue
             except Exception as e:
                 logger.debug(f"Error extracting assets from rendered DOM: {e}")
     
-    def _save_page(self, url: str, html_content: str, soup: BeautifulSoup):
-        """Save page HTML and extract metadata"""
+    def _queue_srcset(self, tag, page_url: str) -> bool:
+        """Queue the srcset variants selected by srcset_policy. Returns True if any were found"""
+        srcset = tag.get('srcset') or tag.get('data-srcset')
+        if not srcset:
+            return False
+        candidates = parse_srcset(srcset)
+        for url in select_srcset_candidates(candidates, self.srcset_policy, tag.get('sizes')):
+            self._queue_asset(url, "images", base=page_url)
+        return bool(candidates)
+    
+    def _save_page(self, url: str, html_content: bytes, soup: BeautifulSoup, encoding: str = 'utf-8') -> Dict:
+        """Save page HTML (bytes as received) and extract metadata"""
         parsed = urlparse(url)
         path_parts = [p for p in parsed.path.split('/') if p]
         
@@ -414,112 +3115,445 @@ class WebsiteScraper:
             if not filename.endswith(('.html', '.htm')):
                 filename += ".html"
         
-        filename = re.sub(r'[^\w\-_\.]', '_', filename)
-        filepath = self.output_dir / "pages" / filename
-        
-        filepath.write_text(html_content, encoding='utf-8')
-        
-        # Extract metadata
-        title = soup.find('title')
-        title_text = title.get_text() if title else ""
-        
-        meta_description = soup.find('meta', attrs={'name': 'description'})
-        description = meta_description.get('content', '') if meta_description else ""
+        filename = claim_local_name(re.sub(r'[^\w\-_\.]', '_', filename), url, self._page_owners)
+        if self.save_to_disk:
+            self.storage.put(f"pages/{filename}", html_content, f'text/html; charset={encoding}')
         
-        text_content = soup.get_text(separator='\n', strip=True)
+        title_text, description, structured_data = extract_page_metadata(soup)
         
-        # Extract structured data
-        structured_data = []
-        for script in soup.find_all('script', type='application/ld+json'):
-            try:
-                structured_data.append(json.loads(script.string))
-            except:
-                pass
+        boilerplate_blocks = []
+        if self.templates:
+            blocks = iter_text_blocks(soup)
+            self.templates.add_page(url, blocks)
+            text_content, boilerplate_blocks = self.templates.split(blocks)
+            if self.save_to_disk:
+                self._page_block_ids[url] = list(dict.fromkeys(block_id for block_id, _ in blocks))
+        else:
+            text_content = soup.get_text(separator='\n', strip=True)
         
         page_data = {
             'url': url,
             'filename': filename,
+            'encoding': encoding,
             'title': title_text,
             'description': description,
             'text_content': text_content[:1000],
+            'boilerplate_blocks': boilerplate_blocks,
             'structured_data': structured_data,
             'scraped_at': datetime.now().isoformat()
         }
         
-        self.pages_data.append(page_data)
-        logger.info(f"Saved page: {filename}")
+        if self.save_to_disk:
+            # A page saved again (e.g. by the revisit scheduler) replaces its entry
+            position = self._page_positions.setdefault(url, len(self.pages_data))
+            if position < len(self.pages_data):
+                self.pages_data[position] = page_data
+            else:
+                self.pages_data.append(page_data)
+        if self.search_index:
+            self.search_index.add_page(url, filename, title_text, description, text_content,
+                                       structured_data, page_data['scraped_at'])
+        logger.debug("Saved page: %s", filename)
+        return page_data
+    
+    def _apply_boilerplate(self):
+        """Re-split pages whose boilerplate changed after they were saved"""
+        if not self.templates or not self.save_to_disk:
+            return
+        for page in self.pages_data:
+            block_ids = self._page_block_ids.get(page['url'], [])
+            if [b for b in block_ids if self.templates.is_boilerplate(b)] == page['boilerplate_blocks']:
+                continue
+            try:
+                html_content = (self.output_dir / "pages" / page['filename']).read_bytes()
+            except OSError:
+                continue
+            blocks = iter_text_blocks(BeautifulSoup(html_content, 'html.parser',
+                                                    from_encoding=page.get('encoding', 'utf-8')))
+            text_content, page['boilerplate_blocks'] = self.templates.split(blocks)
+            page['text_content'] = text_content[:1000]
+            if self.search_index:
+                self.search_index.add_page(page['url'], page['filename'], page['title'], page['description'],
+                                           text_content, page['structured_data'], page['scraped_at'])
     
     def scrape_page(self, url: str, use_selenium: bool = False):
-        """Scrape a single page"""
+        """Scrape a single page and return the links found on it"""
+        record = self._scrape_page_record(url, use_selenium=use_selenium)
+        if record and record['status'] == 'ok':
+            return record['links']
+        return None
+    
+    def _scrape_page_record(self, url: str, use_selenium: bool = False,
+                            prefetched: Optional[Tuple[bytes, str]] = None) -> Optional[Dict]:
+        """
+        Scrape a single page.
+        
+        prefetched is the page's raw HTML and encoding when it has already been
+        fetched over plain HTTP (e.g. by a revisit), so it is not fetched again.
+        
+        Returns:
+            Page record (see iter_pages), or None if the URL was already visited
+        """
         normalized_url = self._normalize_url(url)
         
         if normalized_url in self.visited_urls:
-            return
+            return None
         
         self.visited_urls.add(normalized_url)
         
         html_content = None
+        encoding = 'utf-8'
         driver_used = False
+        raw_html, raw_encoding, supplement = None, 'utf-8', None
+        if prefetched:
+            raw_html, raw_encoding = prefetched
         
-        if use_selenium and self.driver:
-            html_content = self._get_page_content(normalized_url, use_selenium=True)
-            driver_used = True
+        if self.platform == 'squarespace' and self.platform_api:
+            with self._stage('fetch'):
+                raw_html, raw_encoding, supplement = self._fetch_squarespace_page(normalized_url, prefetched)
+            if supplement is not None:
+                html_content, encoding = raw_html, raw_encoding
+        
+        if not html_content and use_selenium and self.selenium_available() and \
+                self._budget_allows('render', normalized_url):
+            with self._stage('render'):
+                html_content, encoding, driver_used = self._render_page(normalized_url, prefetched)
+        
+        if not html_content and raw_html:
+            # No JSON content and no render; the plain HTML is already here
+            html_content, encoding = raw_html, raw_encoding
         
         if not html_content:
-            html_content = self._get_page_content(normalized_url, use_selenium=False)
+            with self._stage('fetch'):
+                html_content, encoding = self._get_page_content(normalized_url, use_selenium=False)
         
         if not html_content:
             self.failed_urls.add(normalized_url)
             logger.warning(f"Failed to fetch: {normalized_url}")
-            return
+            return {'url': normalized_url, 'status': 'failed', 'html': None, 'encoding': None, 'links': set(),
+                    'assets': [], 'metadata': None, 'rendered': driver_used}
+        
+        return self._process_page(normalized_url, html_content, driver_used, encoding, supplement)
+    
+    def _detect_platform(self) -> Optional[str]:
+        """Hosting platform of the site, judged from its home page"""
+        try:
+            response = self._fetch(self.base_url, self.page_timeout, session=self.session)
+            self._charge(self.base_url, len(response.content))
+        except Exception as e:
+            logger.debug("Platform detection failed: %s", e)
+            return None
+        return detect_platform(response.content, response.headers)
+    
+    def _fetch_squarespace_page(self, url: str, prefetched: Optional[Tuple[bytes, str]] = None
+                                ) -> Tuple[Optional[bytes], str, Optional[BeautifulSoup]]:
+        """
+        Squarespace fast path: the server-rendered HTML plus the page's
+        ?format=json content, both over plain HTTP. The HTML is only fetched
+        when it is not prefetched.
+        
+        Returns:
+            (html, encoding, supplement). supplement is None when the JSON
+            endpoint is unavailable, so the page should be rendered as usual;
+            html is then whatever plain HTML could be fetched (or None)
+        """
+        if prefetched:
+            html, encoding = prefetched
+        else:
+            try:
+                response = self._fetch(url, self.page_timeout, session=self.session)
+                self._charge(url, len(response.content))
+                response.raise_for_status()
+            except Exception as e:
+                logger.debug("Could not fetch %s for the Squarespace fast path: %s", url, e)
+                self.platform_pages['fallback'] += 1
+                return None, 'utf-8', None
+            finally:
+                time.sleep(self.request_delay)
+            html = response.content
+            encoding = detect_html_encoding(html, response.headers.get('Content-Type'))
+        
+        try:
+            json_url = squarespace_json_url(url)
+            json_response = self._fetch(json_url, self.page_timeout, session=self.session)
+            self._charge(json_url, len(json_response.content))
+            json_response.raise_for_status()
+            data = json.loads(json_response.content)
+            if not isinstance(data, dict):
+                raise ValueError("not a JSON object")
+        except Exception as e:
+            logger.debug("No Squarespace JSON for %s (%s); falling back", url, e)
+            self.platform_pages['fallback'] += 1
+            return html, encoding, None
+        finally:
+            time.sleep(self.request_delay)
+        
+        self.platform_pages['json'] += 1
+        return html, encoding, squarespace_supplement(data)
+    
+    def _process_page(self, url: str, html_content: bytes, driver_used: bool = False,
+                      encoding: str = 'utf-8', supplement: Optional[BeautifulSoup] = None) -> Dict:
+        """
+        Extract, download assets for and save already fetched page HTML.
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        supplement is extra markup (e.g. from a platform's JSON endpoint) whose
+        assets and links belong to the page but which is not saved or indexed.
+        """
+        with self._stage('parse'):
+            soup = BeautifulSoup(html_content, 'html.parser', from_encoding=encoding)
+        # Bytes that are invalid in the given encoding make the parser pick
+        # another; record the one the page was actually decoded with
+        encoding = soup.original_encoding or encoding
         
+        self._page_assets = []
         driver_ref = self.driver if driver_used else None
-        self._extract_assets(soup, normalized_url, driver=driver_ref)
-        self._save_page(normalized_url, html_content, soup)
+        with self._stage('extract_assets'):
+            self._extract_assets(soup, url, driver=driver_ref)
+            if supplement is not None:
+                self._extract_assets(supplement, url)
+        with self._stage('assets'):
+            self._process_asset_queue()
+        with self._stage('save'):
+            page_data = self._save_page(url, html_content, soup, encoding)
         
-        links = self._extract_links(soup, normalized_url, driver=driver_ref)
-        return links
+        with self._stage('extract_links'):
+            links = self._extract_links(soup, url, driver=driver_ref, supplement=supplement)
+        assets = [{'url': asset_url, 'type': asset_type}
+                  for asset_url, asset_type in dict(self._page_assets).items()]
+        return {
+            'url': url,
+            'status': 'ok',
+            'html': html_content,
+            'encoding': encoding,
+            'links': links,
+            'assets': assets,
+            'metadata': page_data,
+            'rendered': driver_used,
+        }
     
-    def scrape_all(self, max_pages: int = 1000, use_selenium: bool = False, auto_detect_js: bool = True):
-        """Scrape all pages starting from base URL"""
-        logger.info(f"Starting scrape of {self.base_url}")
+    def _detect_site(self, use_selenium: bool) -> bool:
+        """
+        Auto-detect JavaScript-rendered sites and hosting platforms.
         
-        # Auto-detect JavaScript-rendered sites
-        if auto_detect_js:
-            if 'wix' in self.base_url.lower() or 'parastorage' in self.base_url.lower():
-                if self.driver:
-                    use_selenium = True
-                    logger.info("Detected JavaScript-rendered site - using Selenium")
-                else:
-                    logger.warning("JavaScript site detected but Selenium not available")
+        Returns:
+            use_selenium, switched on for sites that need rendering
+        """
+        self.platform = self._detect_platform()
+        if self.platform == 'wix' or 'wix' in self.base_url.lower() or 'parastorage' in self.base_url.lower():
+            # Wix has no public per-page content endpoint, so it is still rendered
+            if self.selenium_available():
+                use_selenium = True
+                logger.info("Detected JavaScript-rendered site - using Selenium")
+            else:
+                logger.warning("JavaScript site detected but Selenium not available")
+        elif self.platform == 'squarespace' and self.platform_api:
+            logger.info("Detected Squarespace site - reading page content from ?format=json over HTTP")
+        return use_selenium
+    
+    def iter_pages(self, max_pages: int = 1000, use_selenium: bool = False,
+                   auto_detect_js: bool = True) -> Iterator[Dict]:
+        """
+        Crawl from base URL, yielding a record as soon as each page is done.
+        
+        The crawl only advances when the consumer asks for the next record, so
+        a slow consumer naturally throttles the crawler. When save_to_disk is
+        set the summary is written once the generator finishes or is closed;
+        after a KeyboardInterrupt it is written without checking links.
+        
+        Yields:
+            Dicts with 'url', 'status' ("ok" or "failed"), 'html' (the page
+            bytes as received), 'encoding', 'links' (set of URLs), 'assets' (list of {'url', 'type'}),
+            'metadata' (title, description, text, structured data) and
+            'rendered' (whether Selenium produced the HTML)
+        """
+        logger.info(f"Starting scrape of {self.base_url}")
         
         to_visit = {self.base_url}
+        progress = ProgressReporter(max_pages)
+        if self.profiler:
+            self.profiler.start()
+        if self.budget:
+            self.budget.start()
         
-        while to_visit and len(self.visited_urls) < max_pages:
-            current_url = to_visit.pop()
-            
-            if current_url in self.visited_urls:
-                continue
-            
-            links = self.scrape_page(current_url, use_selenium=use_selenium)
+        interrupted = False
+        try:
+            if auto_detect_js:
+                use_selenium = self._detect_site(use_selenium)
             
-            if links:
-                for link in links:
+            while to_visit and len(self.visited_urls) < max_pages:
+                if self.budget and self.budget.exhausted():
+                    self.budget.stop_reason = self.budget.exhausted()
+                    logger.warning(f"Crawl budget exhausted ({self.budget.stop_reason}); "
+                                   f"stopping with {len(to_visit)} pages left in the queue")
+                    break
+                
+                current_url = to_visit.pop()
+                
+                if current_url in self.visited_urls:
+                    continue
+                
+                if not self._budget_allows('page', current_url):
+                    logger.debug("Budget: skipping page on exhausted host: %s", current_url)
+                    continue
+                
+                record = self._scrape_page_record(current_url, use_selenium=use_selenium)
+                if record is None:
+                    continue
+                
+                for link in record['links']:
                     if link not in self.visited_urls:
                         to_visit.add(link)
-            
-            logger.info(f"Progress: {len(self.visited_urls)} pages scraped, {len(to_visit)} in queue, {len(self.assets_downloaded)} assets downloaded")
+                
+                self._collect_image_optimizations()
+                progress.update(len(self.visited_urls), len(to_visit), len(self.assets_downloaded))
+                yield record
+        except KeyboardInterrupt:
+            interrupted = True
+            raise
+        finally:
+            progress.update(len(self.visited_urls), len(to_visit), len(self.assets_downloaded), force=True)
+            self._finish_crawl(check_links=not interrupted)
+    
+    async def aiter_pages(self, max_pages: int = 1000, use_selenium: bool = False,
+                          auto_detect_js: bool = True, buffer_size: int = 1) -> AsyncIterator[Dict]:
+        """
+        Async version of iter_pages.
+        
+        The crawl runs in a worker thread and hands records over through a
+        bounded queue: once buffer_size records are waiting, the crawler
+        blocks until the consumer catches up. Leaving the loop early stops
+        the crawl after the page in progress.
+        """
+        import asyncio  # only async callers pay for importing it
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, buffer_size))
+        stop = threading.Event()
+        done = object()
+        
+        def produce():
+            pages = self.iter_pages(max_pages, use_selenium, auto_detect_js)
+            try:
+                for record in pages:
+                    asyncio.run_coroutine_threadsafe(queue.put(record), loop).result()
+                    if stop.is_set():
+                        break
+            except BaseException as e:
+                asyncio.run_coroutine_threadsafe(queue.put(e), loop).result()
+            finally:
+                pages.close()
+                if not stop.is_set():
+                    asyncio.run_coroutine_threadsafe(queue.put(done), loop).result()
         
-        self._save_summary()
+        producer = loop.run_in_executor(None, produce)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    break
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            # Unblock a producer waiting on a full queue, then let it finish
+            while not queue.empty():
+                queue.get_nowait()
+            await producer
+    
+    def scrape_all(self, max_pages: int = 1000, use_selenium: bool = False, auto_detect_js: bool = True):
+        """Scrape all pages starting from base URL"""
+        for _ in self.iter_pages(max_pages, use_selenium, auto_detect_js):
+            pass
         
         logger.info(f"Scraping complete! Scraped {len(self.visited_urls)} pages")
         logger.info(f"Failed: {len(self.failed_urls)} pages")
         logger.info(f"Downloaded {len(self.assets_downloaded)} assets")
+        slowest = sorted(self.latency.stats()['hosts'].items(), key=lambda item: -item[1]['p95'])[:3]
+        if slowest:
+            logger.info("Slowest by p95: " + ", ".join(f"{host} {stats['p95']:.2f}s" for host, stats in slowest))
+    
+    def _finish_crawl(self, check_links: bool = True):
+        """Wait for background work and write the summary"""
+        with self._stage('summary'):
+            if self.image_jobs:
+                logger.info(f"Waiting for {len(self.image_jobs)} image optimisation jobs")
+            self._collect_image_optimizations(wait=True)
+            self._apply_boilerplate()
+        if check_links and self.link_graph is not None and self.save_to_disk:
+            with self._stage('check_links'):
+                self._check_links()
+        with self._stage('summary'):
+            self._save_summary()
+        
+        if self.profiler:
+            self.profiler.stop()
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            collapsed_path, report_path = self.profiler.write(self.output_dir)
+            logger.info(f"Profile written to {collapsed_path} and {report_path}")
+    
+    def _check_links(self):
+        """Check every recorded link target and write link_graph.json and link_report.json"""
+        targets = self.link_graph.targets()
+        logger.info(f"Checking {len(targets)} link targets with {self.link_workers} workers")
+        checker = LinkChecker(self._new_session(allow_http2=False), self.output_dir / LINK_CACHE_FILENAME,
+                              ttl=self.link_cache_ttl, workers=self.link_workers)
+        try:
+            results = checker.check_all(targets)
+        finally:
+            checker.session.close()
+        self.link_report = build_link_report(self.link_graph, results, self._is_same_domain)
+        self.link_report.update(checked=checker.checked, cached=checker.cached)
+        for filename, data in ((LINK_GRAPH_FILENAME, self.link_graph.to_dict()), (LINK_REPORT_FILENAME, self.link_report)):
+            _write_json_atomic(self.output_dir / filename, data)
+            if self.storage.remote:
+                self.storage.put_file(filename, self.output_dir / filename, 'application/json')
+        logger.info(f"Links: {self.link_report['broken_count']} broken, {self.link_report['redirect_count']} redirected "
+                    f"of {len(targets)} ({checker.cached} from cache); see {LINK_REPORT_FILENAME}")
+    
+    def load_previous_crawl(self) -> List[str]:
+        """
+        Pick up the pages and asset index of an earlier crawl in output_dir, so
+        pages saved from now on update that crawl instead of replacing it.
+        
+        Returns:
+            URLs of the pages the earlier crawl saved
+        """
+        summary_path = self.output_dir / "scraping_summary.json"
+        index_path = self.output_dir / "asset_index.json"
+        if index_path.exists():
+            self.asset_index.update(json.loads(index_path.read_text(encoding='utf-8')))
+            self.assets_downloaded.update(self.asset_index)
+            for asset_url, entry in self.asset_index.items():
+                self._asset_owners.setdefault(entry['path'], asset_url)
+        if not summary_path.exists():
+            return []
+        summary = json.loads(summary_path.read_text(encoding='utf-8'))
+        self.visited_urls.update(summary.get('visited_urls', []))
+        for page in summary.get('pages', []):
+            if page['url'] not in self._page_positions:
+                self._page_owners.setdefault(page['filename'], page['url'])
+                self._page_positions[page['url']] = len(self.pages_data)
+                self.pages_data.append(page)
+        
+        # Carry over the learned site template
+        boilerplate_path = self.output_dir / BOILERPLATE_FILENAME
+        if self.templates and boilerplate_path.exists():
+            blocks = json.loads(boilerplate_path.read_text(encoding='utf-8'))
+            self.templates.page_urls.update(page['url'] for page in self.pages_data)
+            self.templates.pages = max(self.templates.pages, len(self.templates.page_urls))
+            for block_id, block in blocks.items():
+                self.templates.block_pages[block_id] = block['pages']
+                self.templates.block_text[block_id] = block['text']
+        return [page['url'] for page in self.pages_data]
     
     def _save_summary(self):
         """Save scraping summary and metadata"""
+        if not self.save_to_disk:
+            return
+        
+        # Pages and assets first, so the summary's storage stats cover them
+        self.storage.flush()
         summary = {
             'base_url': self.base_url,
             'scraped_at': datetime.now().isoformat(),
@@ -528,29 +3562,997 @@ class WebsiteScraper:
             'total_assets': len(self.assets_downloaded),
             'pages': self.pages_data,
             'visited_urls': list(self.visited_urls),
-            'failed_urls': list(self.failed_urls)
+            'failed_urls': list(self.failed_urls),
+            'transport': self._transport_stats(),
+            'render_cache': self.render_cache.stats() if self.render_cache else None,
+            'budget': self.budget.stats() if self.budget else None,
+            'cassette': self.cassette.stats() if self.cassette else None,
+            'latency': self.latency.stats(),
+            'storage': self.storage.stats(),
+            'platform': {'name': self.platform, 'pages': self.platform_pages} if self.platform else None,
+            'links': {k: v for k, v in self.link_report.items() if k not in ('broken', 'redirects')}
+            if self.link_report else None,
+            'boilerplate': {
+                'template_blocks': len(self.templates.boilerplate()),
+                'pages': self.templates.pages,
+            } if self.templates else None
         }
         
+        def put_json(key: str, data):
+            self.storage.put(key, json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8'), 'application/json')
+        
         summary_path = self.output_dir / "scraping_summary.json"
-        summary_path.write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding='utf-8')
+        put_json(summary_path.name, summary)
+        
+        sitemap = ''.join(f"{page['url']}\n" for page in self.pages_data)
+        self.storage.put("sitemap.txt", sitemap.encode('utf-8'), 'text/plain; charset=utf-8')
+        
+        if self.search_index:
+            self.search_index.commit()
+        
+        put_json("asset_index.json", self.asset_index)
         
-        sitemap_path = self.output_dir / "sitemap.txt"
-        with sitemap_path.open('w', encoding='utf-8') as f:
-            for page in self.pages_data:
-                f.write(f"{page['url']}\n")
+        if self.templates:
+            put_json(BOILERPLATE_FILENAME, self.templates.boilerplate())
         
+        self.storage.flush()
         logger.info(f"Summary saved to {summary_path}")
     
     def __del__(self):
         """Cleanup"""
+        if not hasattr(self, 'base_url'):
+            return  # __init__ rejected its arguments before setting anything up
         if self.driver:
-            self.driver.quit()
+            if self.browser_address:
+                # Leave the warm browser running for the next crawl
+                self.driver.service.stop()
+            else:
+                self.driver.quit()
         if self.session:
             self.session.close()
+        for session in self.asset_sessions.values():
+            session.close()
+        if self.image_pool:
+            self.image_pool.shutdown(wait=False, cancel_futures=True)
+        if self.search_index:
+            self.search_index.close()
+
+
+# ---------------------------------------------------------------------------
+# Offline mirror rewriting
+# ---------------------------------------------------------------------------
+#
+# Pages in pages/ and stylesheets in assets/css/ keep their original URLs so
+# they can be re-parsed later. The rewrite stage writes relinked copies to
+# mirror/ (pages at the top level, stylesheets under mirror/assets/css/) with
+# every known page and asset reference pointing at its local file.
+
+MIRROR_DIR = "mirror"
+
+URL_ATTRIBUTES = {
+    'a': ['href'],
+    'link': ['href', 'data-href'],
+    'img': ['src', 'data-src', 'data-original', 'data-lazy-src'],
+    'script': ['src', 'data-url'],
+    'source': ['src'],
+    'video': ['src', 'poster'],
+    'audio': ['src'],
+    'iframe': ['src'],
+}
+
+# Populated in each worker process by _init_mirror_worker
+_mirror_state: Dict = {}
+
+
+def _mirror_location(entry: Dict) -> str:
+    """Output-relative location a mirrored reference should point at"""
+    if entry['type'] == 'css':
+        return f"{MIRROR_DIR}/{entry['path']}"
+    return entry['path']
+
+
+def _resolve_mirror_target(ref: str, source_url: str, source_location: str,
+                           page_map: Dict[str, str], asset_index: Dict[str, Dict]) -> Optional[str]:
+    """Map a reference found in a page or stylesheet to a relative local path"""
+    ref = ref.strip()
+    if not ref or ref.startswith(('javascript:', 'mailto:', 'tel:', '#', 'data:')):
+        return None
+    
+    absolute = resolve_url(ref, source_url)
+    parsed = urlparse(absolute)
+    without_fragment = urlunparse(parsed._replace(fragment=''))
+    fragment = f"#{parsed.fragment}" if parsed.fragment else ''
+    
+    target = None
+    entry = asset_index.get(without_fragment)
+    if entry:
+        target = _mirror_location(entry)
+    else:
+        normalized = without_fragment.rstrip('/') or without_fragment
+        filename = page_map.get(normalized)
+        if filename:
+            target = f"{MIRROR_DIR}/{filename}"
+    
+    if target is None:
+        return None
+    return os.path.relpath(target, os.path.dirname(source_location)).replace(os.sep, '/') + fragment
+
+
+def _rewrite_css_text(css_text: str, resolve) -> str:
+    """Rewrite url() and @import references in CSS using resolve(ref) -> Optional[str]"""
+    def replace(match):
+        kind = match.lastgroup
+        if kind not in ('import', 'url'):
+            return match.group(0)
+        raw = match.group(kind)
+        local = resolve(raw.strip().strip('"\'').strip())
+        if local is None:
+            return match.group(0)
+        start, end = match.span(kind)
+        offset = match.start()
+        token = match.group(0)
+        return token[:start - offset] + f'"{local}"' + token[end - offset:]
+    
+    return CSS_TOKEN_RE.sub(replace, css_text)
+
+
+def rewrite_html_references(html_content: str, page_url: str, source_location: str,
+                            page_map: Dict[str, str], asset_index: Dict[str, Dict]) -> str:
+    """Return page HTML with page and asset references relinked to local files"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    def resolve(ref):
+        return _resolve_mirror_target(ref, page_url, source_location, page_map, asset_index)
+    
+    for tag_name, attributes in URL_ATTRIBUTES.items():
+        for tag in soup.find_all(tag_name):
+            for attr in attributes:
+                value = tag.get(attr)
+                if isinstance(value, str):
+                    local = resolve(value)
+                    if local:
+                        tag[attr] = local
+    
+    localized = {}
+    for tag in soup.find_all(['img', 'source']):
+        for attr in ('srcset', 'data-srcset'):
+            if not tag.get(attr):
+                continue
+            # Keep only variants that were downloaded, so the browser never
+            # picks a remote one
+            local_candidates = []
+            for url, value, unit in parse_srcset(tag[attr]):
+                local = resolve(url)
+                if local:
+                    local_candidates.append((local, value, unit))
+            if not local_candidates:
+                continue
+            tag[attr] = format_srcset(local_candidates)
+            localized[id(tag)] = local_candidates
+            if tag.name == 'img' and not (tag.get('src') and resolve(tag['src'])):
+                tag['src'] = local_candidates[0][0]
+    
+    # Inside <picture>, drop sources that were not downloaded and point the
+    # fallback <img> at a local variant
+    for picture in soup.find_all('picture'):
+        sources = picture.find_all('source')
+        local_sources = [localized[id(source)] for source in sources if id(source) in localized]
+        if not local_sources:
+            continue
+        for source in sources:
+            if id(source) not in localized:
+                source.decompose()
+        img = picture.find('img')
+        if img is not None and not (img.get('src') and resolve(img['src'])):
+            img['src'] = local_sources[0][0][0]
+    
+    for tag in soup.find_all(style=True):
+        tag['style'] = _rewrite_css_text(tag['style'], resolve)
+    
+    for style_tag in soup.find_all('style'):
+        if style_tag.string:
+            style_tag.string = _rewrite_css_text(style_tag.string, resolve)
+    
+    return str(soup)
+
+
+def _init_mirror_worker(output_dir: str, page_map: Dict[str, str], asset_index: Dict[str, Dict]):
+    """Pool initializer: share the URL -> file maps once per worker process"""
+    _mirror_state['output_dir'] = Path(output_dir)
+    _mirror_state['page_map'] = page_map
+    _mirror_state['asset_index'] = asset_index
+
+
+def _mirror_one(task: Tuple[str, str, str, str]) -> Tuple[str, Optional[str]]:
+    """Rewrite a single page or stylesheet into mirror/. Returns (source, error)"""
+    kind, url, relative_path, encoding = task
+    output_dir = _mirror_state['output_dir']
+    page_map = _mirror_state['page_map']
+    asset_index = _mirror_state['asset_index']
+    try:
+        source = output_dir / relative_path
+        text = source.read_text(encoding=encoding, errors='replace')
+        if kind == 'page':
+            location = f"{MIRROR_DIR}/{source.name}"
+            text = rewrite_html_references(text, url, location, page_map, asset_index)
+        else:
+            location = f"{MIRROR_DIR}/{relative_path}"
+            text = _rewrite_css_text(
+                text, lambda ref: _resolve_mirror_target(ref, url, location, page_map, asset_index)
+            )
+        destination = output_dir / location
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        # Written as UTF-8; serialising the soup rewrites any <meta> charset to match
+        destination.write_text(text, encoding='utf-8')
+        return relative_path, None
+    except Exception as e:
+        return relative_path, str(e)
+
+
+def build_offline_mirror(output_dir: str, workers: Optional[int] = None) -> int:
+    """
+    Relink a finished crawl into a self-contained mirror.
+    
+    Reads scraping_summary.json and asset_index.json from output_dir, then
+    streams every saved page and stylesheet through a process pool.
+    
+    Returns:
+        Number of files written to the mirror
+    """
+    output_path = Path(output_dir)
+    summary = json.loads((output_path / "scraping_summary.json").read_text(encoding='utf-8'))
+    index_path = output_path / "asset_index.json"
+    asset_index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+    
+    page_map = {page['url']: page['filename'] for page in summary.get('pages', [])}
+    tasks = [('page', page['url'], f"pages/{page['filename']}", page.get('encoding', 'utf-8'))
+             for page in summary.get('pages', [])]
+    tasks += [('css', url, entry['path'], 'utf-8') for url, entry in asset_index.items() if entry['type'] == 'css']
+    
+    written = 0
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers, initializer=_init_mirror_worker,
+                              initargs=(str(output_path), page_map, asset_index)) as pool:
+        for relative_path, error in pool.imap_unordered(_mirror_one, tasks, chunksize=16):
+            if error:
+                logger.error(f"Error rewriting {relative_path}: {error}")
+            else:
+                written += 1
+    
+    logger.info(f"Offline mirror written to {output_path / MIRROR_DIR} ({written} files)")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# Content export (JSON bundles for the Next.js site)
+# ---------------------------------------------------------------------------
+#
+# Each saved page becomes <export_dir>/<slug>.json. export_manifest.json keeps
+# the sha256 of every source page so unchanged pages are not rewritten and
+# `next build` only sees bundles whose content actually changed.
+
+EXPORT_FORMAT_VERSION = 1
+EXPORT_MANIFEST_FILENAME = "export_manifest.json"
+
+# Elements that never carry page content
+NON_CONTENT_TAGS = ['script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'svg', 'form']
+CONTENT_BLOCK_TAGS = ['h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'p', 'li', 'blockquote', 'img']
+
+
+def build_content_bundle(html_content: str, page: Dict, asset_index: Dict[str, Dict]) -> Dict:
+    """Turn a saved page into a normalized content bundle"""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    body = soup.body or soup
+    for tag in body.find_all(NON_CONTENT_TAGS):
+        tag.decompose()
+    
+    def image_record(img) -> Optional[Dict]:
+        # Prefer whichever reference (src or a srcset variant) was downloaded
+        refs = [img.get(attr) for attr in ('src', 'data-src', 'data-image') if img.get(attr)]
+        refs += [url for url, _, _ in parse_srcset(img.get('srcset') or img.get('data-srcset') or '')]
+        urls = [resolve_url(ref, page['url']) for ref in refs if not ref.startswith('data:')]
+        if not urls:
+            return None
+        url = next((u for u in urls if u in asset_index), urls[0])
+        entry = asset_index.get(url, {})
+        return {
+            'url': url,
+            'local_path': entry.get('path'),
+            'alt': img.get('alt', ''),
+            'width': entry.get('width'),
+            'height': entry.get('height'),
+        }
+    
+    sections = [{'heading': None, 'level': 0, 'blocks': []}]
+    headings, images = [], []
+    for tag in body.find_all(CONTENT_BLOCK_TAGS):
+        # Paragraphs inside list items etc. are covered by their container
+        if tag.name != 'img' and tag.find_parent(['p', 'li', 'blockquote']):
+            continue
+        if tag.name == 'img':
+            record = image_record(tag)
+            if record:
+                images.append(record)
+                sections[-1]['blocks'].append({'type': 'image', **record})
+            continue
+        
+        text = ' '.join(tag.get_text(' ', strip=True).split())
+        if not text:
+            continue
+        if tag.name[0] == 'h':
+            level = int(tag.name[1])
+            headings.append({'level': level, 'text': text})
+            sections.append({'heading': text, 'level': level, 'blocks': []})
+        elif tag.name == 'li':
+            blocks = sections[-1]['blocks']
+            if blocks and blocks[-1]['type'] == 'list':
+                blocks[-1]['items'].append(text)
+            else:
+                blocks.append({'type': 'list', 'items': [text]})
+        else:
+            sections[-1]['blocks'].append({'type': 'quote' if tag.name == 'blockquote' else 'paragraph', 'text': text})
+    
+    sections = [section for section in sections if section['heading'] or section['blocks']]
+    return {
+        'url': page['url'],
+        'slug': Path(page['filename']).stem,
+        'title': page.get('title', ''),
+        'description': page.get('description', ''),
+        'headings': headings,
+        'sections': sections,
+        'images': images,
+        'structured_data': page.get('structured_data', []),
+        'scraped_at': page.get('scraped_at'),
+    }
+
+
+def _write_json_atomic(path: Path, data):
+    """Write JSON via a temporary file so readers never see a partial bundle"""
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(json.dumps(data, indent=2, ensure_ascii=False), encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def export_content_bundles(output_dir: str, export_dir: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Export saved pages as JSON content bundles, rewriting only changed pages.
+    
+    Args:
+        output_dir: Crawl output directory (with scraping_summary.json)
+        export_dir: Where bundles go (default: <output_dir>/export)
+    
+    Returns:
+        (bundles written, bundles unchanged)
+    """
+    output_path = Path(output_dir)
+    export_path = Path(export_dir) if export_dir else output_path / "export"
+    export_path.mkdir(parents=True, exist_ok=True)
+    
+    summary = json.loads((output_path / "scraping_summary.json").read_text(encoding='utf-8'))
+    index_path = output_path / "asset_index.json"
+    asset_index = json.loads(index_path.read_text(encoding='utf-8')) if index_path.exists() else {}
+    
+    manifest_path = export_path / EXPORT_MANIFEST_FILENAME
+    manifest = {}
+    if manifest_path.exists():
+        manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    if manifest.get('version') != EXPORT_FORMAT_VERSION:
+        manifest = {'version': EXPORT_FORMAT_VERSION, 'bundles': {}}
+    previous = manifest['bundles']
+    
+    bundles = {}
+    written = unchanged = 0
+    for page in summary.get('pages', []):
+        source = output_path / "pages" / page['filename']
+        if not source.exists():
+            continue
+        raw = source.read_bytes()
+        source_hash = hashlib.sha256(raw).hexdigest()
+        bundle_name = f"{Path(page['filename']).stem}.json"
+        bundles[bundle_name] = {'url': page['url'], 'source_hash': source_hash}
+        
+        if previous.get(bundle_name, {}).get('source_hash') == source_hash and (export_path / bundle_name).exists():
+            unchanged += 1
+            continue
+        
+        bundle = build_content_bundle(raw.decode(page.get('encoding', 'utf-8'), errors='replace'), page, asset_index)
+        bundle['source_hash'] = source_hash
+        _write_json_atomic(export_path / bundle_name, bundle)
+        written += 1
+    
+    # Drop bundles for pages that are no longer part of the crawl
+    for stale in set(previous) - set(bundles):
+        (export_path / stale).unlink(missing_ok=True)
+    
+    manifest['bundles'] = bundles
+    _write_json_atomic(manifest_path, manifest)
+    logger.info(f"Exported content bundles to {export_path}: {written} written, {unchanged} unchanged")
+    return written, unchanged
+
+
+# ---------------------------------------------------------------------------
+# Adaptive revisits (schedule subcommand)
+# ---------------------------------------------------------------------------
+
+REVISIT_STATE_FILENAME = "revisit_state.sqlite"
+# Assumed change rate for pages without history: once a day
+DEFAULT_CHANGE_RATE = 1 / 86400
+
+
+def estimate_change_rate(checks: int, changes: int, observed_seconds: float) -> float:
+    """
+    Estimate how often a page changes (changes per second) from its revisits.
+    
+    Uses Cho & Garcia-Molina's bias-reduced estimator for Poisson changes
+    seen at discrete visits; a plain changes/time ratio undercounts pages
+    that changed more than once between two visits. Pages never seen to
+    change are assumed to change about once per two observed periods, so
+    their interval grows with the evidence instead of jumping to the maximum.
+    """
+    if checks == 0 or observed_seconds <= 0:
+        return DEFAULT_CHANGE_RATE
+    mean_interval = observed_seconds / checks
+    estimate = -math.log((checks - changes + 0.5) / (checks + 0.5)) / mean_interval
+    return max(estimate, 0.5 / observed_seconds)
+
+
+class RevisitScheduler:
+    """
+    Keeps a crawl fresh by revisiting each page in proportion to how often it changes.
+    
+    Every URL has a revisit interval of scale / sqrt(change rate). The scale
+    is chosen so the expected fetches over all URLs match the global budget,
+    which sends most fetches to pages that change often. Revisits are
+    conditional GETs, and only pages whose fingerprint changed are scraped
+    again (rendered or read through a platform API like any crawled page).
+    Per-URL history and the unspent budget are kept in SQLite,
+    so the scheduler can run as a daemon or be restarted from cron.
+    """
+    
+    def __init__(self, scraper: 'WebsiteScraper', state_path: Path, fetches_per_hour: float = 120,
+                 min_interval: float = 600, max_interval: float = 30 * 86400, use_selenium: bool = False):
+        self.scraper = scraper
+        self.use_selenium = use_selenium
+        self.fetches_per_hour = fetches_per_hour
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.conn = sqlite3.connect(str(state_path))
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS urls (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                last_visit REAL,
+                next_visit REAL NOT NULL,
+                checks INTEGER NOT NULL DEFAULT 0,
+                changes INTEGER NOT NULL DEFAULT 0,
+                observed_seconds REAL NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS urls_next_visit ON urls(next_visit);
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value REAL);
+        """)
+    
+    def add_urls(self, urls, when: Optional[float] = None):
+        """Start tracking URLs (already tracked ones are left alone)"""
+        when = time.time() if when is None else when
+        self.conn.executemany("INSERT OR IGNORE INTO urls (url, next_visit) VALUES (?, ?)",
+                              [(url, when) for url in urls])
+        self.conn.commit()
+    
+    def seed_from_crawl(self):
+        """
+        Give URLs that were never revisited the fingerprint of the page the
+        crawl saved, so unchanged pages are not saved again on the first round.
+        Rendered pages use the raw fingerprint their cached render was made from.
+        """
+        unseeded = {url for (url,) in self.conn.execute("SELECT url FROM urls WHERE fingerprint IS NULL")}
+        pages_dir = self.scraper.output_dir / "pages"
+        render_cache = self.scraper.render_cache
+        rows = []
+        for page in self.scraper.pages_data:
+            if page['url'] not in unseeded:
+                continue
+            fingerprint = render_cache.fingerprint(page['url']) if render_cache else None
+            if fingerprint is None:
+                try:
+                    fingerprint = render_fingerprint((pages_dir / page['filename']).read_bytes())
+                except OSError:
+                    continue
+            # The saved page counts as the baseline visit
+            rows.append((fingerprint, datetime.fromisoformat(page['scraped_at']).timestamp(), page['url']))
+        self.conn.executemany("UPDATE urls SET fingerprint = ?, last_visit = ? WHERE url = ?", rows)
+        self.conn.commit()
+    
+    def _meta(self, key: str) -> Optional[float]:
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def _set_meta(self, key: str, value: float):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+    
+    def _allowance(self) -> int:
+        """Fetches available now; unused budget carries over for up to an hour"""
+        now = time.time()
+        credit, credit_at = self._meta('credit'), self._meta('credit_at')
+        if credit is None or credit_at is None:
+            credit = self.fetches_per_hour
+        else:
+            credit = min(self.fetches_per_hour, credit + (now - credit_at) * self.fetches_per_hour / 3600)
+        self._set_meta('credit', credit)
+        self._set_meta('credit_at', now)
+        self.conn.commit()
+        return int(credit)
+    
+    def _spend(self, fetches: int):
+        self._set_meta('credit', self._meta('credit') - fetches)
+        self.conn.commit()
+    
+    def _interval_scale(self) -> float:
+        """Scale making sum(1 / interval) over all URLs equal the fetch budget"""
+        rates = [estimate_change_rate(*row) for row in
+                 self.conn.execute("SELECT checks, changes, observed_seconds FROM urls")]
+        return sum(math.sqrt(rate) for rate in rates) * 3600 / self.fetches_per_hour
+    
+    def _interval(self, rate: float, scale: float) -> float:
+        if rate <= 0:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, scale / math.sqrt(rate)))
+    
+    def visit(self, url: str, scale: float) -> bool:
+        """Revisit one URL, re-extract it if it changed and reschedule it"""
+        fingerprint, etag, last_modified, last_visit, checks, changes, observed = self.conn.execute(
+            "SELECT fingerprint, etag, last_modified, last_visit, checks, changes, observed_seconds "
+            "FROM urls WHERE url = ?", (url,)).fetchone()
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        
+        now = time.time()
+        try:
+            response = self.scraper._fetch(url, self.scraper.page_timeout, session=self.scraper.session,
+                                           headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except Exception as e:
+            logger.warning(f"Revisit failed for {url}: {e}")
+            rate = estimate_change_rate(checks, changes, observed)
+            self.conn.execute("UPDATE urls SET next_visit = ? WHERE url = ?",
+                              (now + self._interval(rate, scale), url))
+            self.conn.commit()
+            return False
+        
+        changed = False
+        if response.status_code != 304:
+            new_fingerprint = render_fingerprint(response.content)
+            changed = new_fingerprint != fingerprint
+            if changed:
+                logger.debug("%s: %s", "Changed" if fingerprint else "Baseline", url)
+                # Scrape it like a crawled page, reusing the body just fetched
+                self.scraper.visited_urls.discard(self.scraper._normalize_url(url))
+                encoding = detect_html_encoding(response.content, response.headers.get('Content-Type'))
+                record = self.scraper._scrape_page_record(url, self.use_selenium, (response.content, encoding))
+                self.add_urls(record['links'])
+            fingerprint = new_fingerprint
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+        
+        # The first visit only establishes a baseline
+        if last_visit is not None:
+            checks += 1
+            changes += int(changed)
+            observed += now - last_visit
+        rate = estimate_change_rate(checks, changes, observed)
+        self.conn.execute(
+            "UPDATE urls SET fingerprint = ?, etag = ?, last_modified = ?, last_visit = ?, next_visit = ?, "
+            "checks = ?, changes = ?, observed_seconds = ? WHERE url = ?",
+            (fingerprint, etag, last_modified, now, now + self._interval(rate, scale),
+             checks, changes, observed, url))
+        self.conn.commit()
+        return changed and last_visit is not None
+    
+    def tick(self) -> Dict:
+        """Visit the most overdue URLs the budget allows"""
+        allowance = self._allowance()
+        due = [url for (url,) in self.conn.execute(
+            "SELECT url FROM urls WHERE next_visit <= ? ORDER BY next_visit LIMIT ?", (time.time(), allowance))]
+        if not due:
+            return {'visited': 0, 'changed': 0}
+        
+        scale = self._interval_scale()
+        changed = 0
+        for url in due:
+            changed += self.visit(url, scale)
+            self._spend(1)
+            time.sleep(self.scraper.request_delay)
+        self.scraper._save_summary()
+        return {'visited': len(due), 'changed': changed}
+    
+    def stats(self) -> Dict:
+        tracked, due = self.conn.execute(
+            "SELECT COUNT(*), SUM(next_visit <= ?) FROM urls", (time.time(),)).fetchone()
+        return {'tracked': tracked, 'due': due or 0}
+    
+    def run(self, tick_seconds: float = 60, once: bool = False):
+        """Revisit due pages every tick_seconds until interrupted"""
+        try:
+            while True:
+                result = self.tick()
+                if result['visited']:
+                    stats = self.stats()
+                    logger.info(f"Revisited {result['visited']} pages, {result['changed']} changed; "
+                                f"{stats['tracked']} tracked, {stats['due']} still due")
+                if once:
+                    return
+                time.sleep(tick_seconds)
+        finally:
+            self.conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Offline re-extraction (reprocess subcommand)
+# ---------------------------------------------------------------------------
+
+ASSET_QUEUE_FILENAME = "asset_queue.json"
+LINKS_FILENAME = "links.json"
+
+_reprocess_state: Dict = {}
+
+
+def _init_reprocess_worker(base_url: str, srcset_policy: str, pages_dir: Optional[str], archive: Optional[str]):
+    """Pool initializer: one offline scraper (and open archive) per worker"""
+    _reprocess_state['scraper'] = WebsiteScraper(
+        base_url, request_delay=0, srcset_policy=srcset_policy, save_to_disk=False,
+        search_index=False, render_cache=False, detect_boilerplate=False,
+    )
+    _reprocess_state['pages_dir'] = Path(pages_dir) if pages_dir else None
+    if archive:
+        _reprocess_state['archive'] = zipfile.ZipFile(archive)
+
+
+def _read_saved_page(source: str, encoding: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Decode a saved page straight from a memory map (or archive member).
+    
+    Returns:
+        (text, encoding); the encoding is detected from the page when not given
+    """
+    archive = _reprocess_state.get('archive')
+    if archive:
+        body = archive.read(source)
+        encoding = encoding or detect_html_encoding(body)
+        return body.decode(encoding, errors='replace'), encoding
+    with open(_reprocess_state['pages_dir'] / source, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return '', encoding or 'utf-8'
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            encoding = encoding or detect_html_encoding(mapped[:])
+            return str(mapped, encoding, 'replace'), encoding
+
+
+def _reprocess_one(task: Tuple[str, str, Optional[str]]) -> Dict:
+    """Run the extraction stages over one saved page, without network"""
+    url, source, encoding = task
+    scraper = _reprocess_state['scraper']
+    try:
+        text, encoding = _read_saved_page(source, encoding)
+        soup = BeautifulSoup(text, 'html.parser')
+        scraper._page_assets = []
+        scraper._extract_assets(soup, url)
+        title, description, structured_data = extract_page_metadata(soup)
+        return {
+            'url': url,
+            'encoding': encoding,
+            'title': title,
+            'description': description,
+            'structured_data': structured_data,
+            'blocks': iter_text_blocks(soup),
+            'links': sorted(scraper._extract_links(soup, url)),
+            'assets': list(dict(scraper._page_assets).items()),
+            'error': None,
+        }
+    except Exception as e:
+        return {'url': url, 'error': str(e)}
+
+
+def reprocess_saved_pages(output_dir: str, archive: Optional[str] = None, base_url: Optional[str] = None,
+                          workers: Optional[int] = None, detect_boilerplate: bool = True,
+                          search_index: bool = True, asset_hosts: Optional[List[str]] = None,
+                          site_config: Optional[Dict] = None) -> int:
+    """
+    Re-run extraction over pages saved by an earlier crawl, with no network.
+    
+    Pages are read from output_dir/pages through memory maps (or from a zip
+    archive of them) and parsed across a process pool. The page metadata, the site
+    template, the search index, the summary and sitemap are rebuilt. Links
+    per page go to links.json, and assets the pages reference but that were
+    never downloaded go to asset_queue.json. Like the crawl, that queue only
+    takes assets on the site or on hosts allowed by asset_hosts/site_config.
+    
+    Returns:
+        Number of pages reprocessed
+    """
+    output_path = Path(output_dir)
+    summary_path = output_path / "scraping_summary.json"
+    archive_file = zipfile.ZipFile(archive) if archive else None
+    
+    summary = {}
+    if summary_path.exists():
+        summary = json.loads(summary_path.read_text(encoding='utf-8'))
+    elif archive_file:
+        member = next((n for n in archive_file.namelist() if n.endswith('scraping_summary.json')), None)
+        if member:
+            summary = json.loads(archive_file.read(member))
+    base_url = base_url or summary.get('base_url')
+    if not base_url:
+        raise ValueError("No scraping_summary.json found; pass the site's base URL")
+    
+    # filename -> where the saved HTML lives (file in pages/ or archive member)
+    if archive_file:
+        sources = {os.path.basename(n): n for n in archive_file.namelist() if n.endswith(('.html', '.htm'))}
+        archive_file.close()
+    else:
+        sources = {path.name: path.name for path in (output_path / "pages").glob('*.htm*')}
+    
+    previous = {page['filename']: page for page in summary.get('pages', [])}
+    tasks, filenames = [], {}
+    for filename, source in sorted(sources.items()):
+        page = previous.get(filename)
+        # Pages saved before encodings were recorded were written as UTF-8
+        encoding = page.get('encoding', 'utf-8') if page else None
+        if page:
+            url = page['url']
+        elif filename == 'index.html':
+            url = base_url.rstrip('/')
+        else:
+            url = urljoin(base_url.rstrip('/') + '/', filename)
+        filenames[url] = filename
+        tasks.append((url, source, encoding))
+    
+    scraper = WebsiteScraper(base_url, output_dir, request_delay=0, search_index=search_index,
+                             render_cache=False, detect_boilerplate=detect_boilerplate,
+                             asset_host_policy=AssetHostPolicy.for_site(urlparse(base_url).netloc,
+                                                                        asset_hosts, site_config))
+    scraper.load_previous_crawl()
+    scraper.failed_urls.update(summary.get('failed_urls', []))
+    if scraper.templates:
+        # Learn the template afresh from the pages as they are now
+        scraper.templates = TemplateDetector()
+    
+    # Block texts are kept once per distinct block; pages keep only block ids
+    results: Dict[str, Dict] = {}
+    block_texts: Dict[str, str] = {}
+    workers = workers or os.cpu_count() or 1
+    with multiprocessing.Pool(workers, initializer=_init_reprocess_worker,
+                              initargs=(base_url, scraper.srcset_policy,
+                                        None if archive else str(output_path / "pages"), archive)) as pool:
+        for result in pool.imap_unordered(_reprocess_one, tasks, chunksize=32):
+            if result['error']:
+                logger.error(f"Error reprocessing {result['url']}: {result['error']}")
+                continue
+            blocks = result.pop('blocks')
+            if scraper.templates:
+                scraper.templates.add_page(result['url'], blocks)
+            for block_id, text in blocks:
+                block_texts.setdefault(block_id, text)
+            result['block_ids'] = [block_id for block_id, _ in blocks]
+            results[result['url']] = result
+    
+    # Second pass, once the template has been learned from every page
+    pending_assets: Dict[str, Dict] = {}
+    links = {}
+    scraper.pages_data, scraper._page_positions = [], {}
+    for url, _, _ in tasks:
+        result = results.get(url)
+        if result is None:
+            continue
+        blocks = [(block_id, block_texts[block_id]) for block_id in result['block_ids']]
+        if scraper.templates:
+            text_content, boilerplate_blocks = scraper.templates.split(blocks)
+        else:
+            text_content, boilerplate_blocks = '\n'.join(text for _, text in blocks), []
+        scraped_at = previous.get(filenames[url], {}).get('scraped_at') or datetime.now().isoformat()
+        page_data = {
+            'url': url,
+            'filename': filenames[url],
+            'encoding': result['encoding'],
+            'title': result['title'],
+            'description': result['description'],
+            'text_content': text_content[:1000],
+            'boilerplate_blocks': boilerplate_blocks,
+            'structured_data': result['structured_data'],
+            'scraped_at': scraped_at,
+        }
+        scraper._page_positions[url] = len(scraper.pages_data)
+        scraper.pages_data.append(page_data)
+        scraper.visited_urls.add(url)
+        if scraper.search_index:
+            scraper.search_index.add_page(url, page_data['filename'], page_data['title'], page_data['description'],
+                                          text_content, page_data['structured_data'], scraped_at)
+        links[url] = result['links']
+        for asset_url, asset_type in result['assets']:
+            if asset_url not in scraper.asset_index and scraper._asset_host_allowed(asset_url):
+                entry = pending_assets.setdefault(asset_url, {'url': asset_url, 'type': asset_type, 'pages': 0})
+                entry['pages'] += 1
+    
+    scraper._save_summary()
+    _write_json_atomic(output_path / LINKS_FILENAME, links)
+    _write_json_atomic(output_path / ASSET_QUEUE_FILENAME, sorted(pending_assets.values(), key=lambda a: -a['pages']))
+    logger.info(f"Reprocessed {len(scraper.pages_data)} pages with {workers} workers; "
+                f"{len(pending_assets)} referenced assets not downloaded")
+    return len(scraper.pages_data)
+
+
+def search_command(argv: List[str]):
+    """search subcommand: query the full-text index of a finished crawl"""
+    parser = argparse.ArgumentParser(prog='website_scraper.py search',
+                                     description='Search scraped pages (SQLite FTS5 query syntax)')
+    parser.add_argument('query', type=str, help='Search query, e.g. "nitrile gloves" or wholesale OR bulk')
+    parser.add_argument('--output', type=str, default='scraped_content', help='Output directory of the crawl')
+    parser.add_argument('--limit', type=int, default=20, help='Maximum results')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+    
+    index_path = Path(args.output) / SEARCH_INDEX_FILENAME
+    if not index_path.exists():
+        parser.error(f"No search index at {index_path}")
+    
+    index = SearchIndex(index_path)
+    try:
+        results = index.search(args.query, limit=args.limit)
+    except sqlite3.OperationalError as e:
+        parser.error(f"Invalid query: {e}")
+    finally:
+        index.close()
+    
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+    for result in results:
+        print(f"{result['url']}  ({result['title']})")
+        print(f"    {' '.join(result['snippet'].split())}")
+    print(f"{len(results)} result(s)")
+
+
+def export_command(argv: List[str]):
+    """export subcommand: write JSON content bundles from a finished crawl"""
+    parser = argparse.ArgumentParser(prog='website_scraper.py export',
+                                     description='Export scraped pages as JSON content bundles')
+    parser.add_argument('--output', type=str, default='scraped_content', help='Output directory of the crawl')
+    parser.add_argument('--export-dir', type=str, help='Bundle directory (default: <output>/export)')
+    parser.add_argument('--log', type=str, default='scraper.log', help='Log file path')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help='Log line format; json writes one object per line')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Also log every fetched page and asset')
+    args = parser.parse_args(argv)
+    
+    global logger
+    logger = setup_logging(args.log, args.log_format, args.verbose)
+    export_content_bundles(args.output, args.export_dir)
+
+
+def schedule_command(argv: List[str]):
+    """schedule subcommand: keep a crawl fresh with adaptive revisits"""
+    parser = argparse.ArgumentParser(prog='website_scraper.py schedule',
+                                     description='Revisit pages of a crawl as often as they change, within a fetch budget')
+    parser.add_argument('--url', type=str, required=True, help='Base URL of the site')
+    parser.add_argument('--output', type=str, default='scraped_content', help='Output directory of the crawl')
+    parser.add_argument('--budget', type=float, default=120, help='Page fetches per hour across all URLs')
+    parser.add_argument('--tick', type=float, default=60, help='Seconds between scheduling rounds')
+    parser.add_argument('--min-interval', type=float, default=600, help='Shortest revisit interval (seconds)')
+    parser.add_argument('--max-interval', type=float, default=30 * 86400, help='Longest revisit interval (seconds)')
+    parser.add_argument('--once', action='store_true', help='Run a single round and exit (for cron)')
+    parser.add_argument('--delay', type=float, default=1.0, help='Delay between requests (seconds)')
+    parser.add_argument('--no-selenium', action='store_true', help='Disable Selenium even if available')
+    parser.add_argument('--log', type=str, default='scraper.log', help='Log file path')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help='Log line format; json writes one object per line')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Also log every fetched page and asset')
+    args = parser.parse_args(argv)
+    
+    global logger
+    logger = setup_logging(args.log, args.log_format, args.verbose)
+    
+    scraper = WebsiteScraper(args.url, args.output, args.delay)
+    previous_urls = scraper.load_previous_crawl()
+    use_selenium = scraper._detect_site(not args.no_selenium and scraper.selenium_available())
+    scheduler = RevisitScheduler(scraper, Path(args.output) / REVISIT_STATE_FILENAME, args.budget,
+                                 args.min_interval, args.max_interval, use_selenium)
+    scheduler.add_urls([scraper.base_url, *previous_urls])
+    scheduler.seed_from_crawl()
+    
+    # Let service managers stop the daemon cleanly
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.info(f"Scheduling revisits of {scheduler.stats()['tracked']} URLs at {args.budget:g} fetches/hour")
+    try:
+        scheduler.run(args.tick, once=args.once)
+    except KeyboardInterrupt:
+        pass
+
+
+def reprocess_command(argv: List[str]):
+    """reprocess subcommand: re-run extraction over saved pages without network"""
+    parser = argparse.ArgumentParser(prog='website_scraper.py reprocess',
+                                     description='Rebuild page data, indexes and the asset queue from saved pages')
+    parser.add_argument('--output', type=str, default='scraped_content', help='Output directory of the crawl')
+    parser.add_argument('--archive', type=str, help='Read pages from this zip archive instead of <output>/pages')
+    parser.add_argument('--url', type=str, help='Base URL of the site (default: from scraping_summary.json)')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--keep-boilerplate', action='store_true', help='Do not strip repeated site template text')
+    parser.add_argument('--no-search-index', action='store_true', help='Skip rebuilding search_index.sqlite')
+    parser.add_argument('--asset-host', action='append', default=[], metavar='PATTERN',
+                        help='Extra external asset host to queue, as for the crawl (glob, or re:<regex>); repeatable')
+    parser.add_argument('--site-config', type=str, help='JSON file with per-site settings such as asset_hosts')
+    parser.add_argument('--log', type=str, default='scraper.log', help='Log file path')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help='Log line format; json writes one object per line')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Also log every fetched page and asset')
+    args = parser.parse_args(argv)
+    
+    global logger
+    logger = setup_logging(args.log, args.log_format, args.verbose)
+    if args.archive and not zipfile.is_zipfile(args.archive):
+        parser.error(f"Not a zip archive: {args.archive}")
+    site_config = None
+    if args.site_config:
+        site_config = json.loads(Path(args.site_config).read_text(encoding='utf-8'))
+    try:
+        reprocess_saved_pages(args.output, args.archive, args.url, args.workers,
+                              detect_boilerplate=not args.keep_boilerplate,
+                              search_index=not args.no_search_index,
+                              asset_hosts=args.asset_host, site_config=site_config)
+    except ValueError as e:
+        parser.error(str(e))
+
+
+def browser_command(argv: List[str]):
+    """browser subcommand: start a persistent headless Chrome for --browser-address"""
+    parser = argparse.ArgumentParser(prog='website_scraper.py browser',
+                                     description='Run a warm headless Chrome that crawls can attach to')
+    parser.add_argument('--port', type=int, default=9222, help='Remote debugging port')
+    parser.add_argument('--chrome', type=str, help='Chrome/Chromium executable (default: search PATH)')
+    parser.add_argument('--profile-dir', type=str, default=os.path.join(tempfile.gettempdir(), 'scraper-chrome-profile'),
+                        help='Browser profile directory (kept between runs for a warm cache)')
+    args = parser.parse_args(argv)
+    
+    chrome = args.chrome or next(
+        (path for name in ('google-chrome', 'google-chrome-stable', 'chromium', 'chromium-browser', 'chrome')
+         if (path := shutil.which(name))), None
+    )
+    if not chrome or not shutil.which(chrome):
+        parser.error("Chrome not found; install it or pass --chrome")
+    
+    command = [
+        chrome, '--headless=new', f'--remote-debugging-port={args.port}', f'--user-data-dir={args.profile_dir}',
+        '--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu', '--window-size=1920,1080',
+        '--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+    ]
+    process = subprocess.Popen(command)
+    print(f"Browser running (pid {process.pid}). Crawl with: --browser-address 127.0.0.1:{args.port}")
+    try:
+        process.wait()
+    except KeyboardInterrupt:
+        process.terminate()
+        process.wait()
+
+
+# Subcommands dispatched on the first argument; anything else is a crawl
+COMMANDS = {
+    'search': search_command,
+    'export': export_command,
+    'browser': browser_command,
+    'schedule': schedule_command,
+    'reprocess': reprocess_command,
+}
 
 
 def main():
     """Main function with command-line interface"""
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS:
+        return COMMANDS[sys.argv[1]](sys.argv[2:])
+    
     parser = argparse.ArgumentParser(description='Comprehensive website scraper')
     parser.add_argument('--url', type=str, required=True, help='Base URL to scrape')
     parser.add_argument('--output', type=str, default='scraped_content', help='Output directory')
@@ -559,21 +4561,126 @@ def main():
     parser.add_argument('--selenium', action='store_true', help='Force use of Selenium')
     parser.add_argument('--no-selenium', action='store_true', help='Disable Selenium even if available')
     parser.add_argument('--log', type=str, default='scraper.log', help='Log file path')
+    parser.add_argument('--log-format', choices=('text', 'json'), default='text',
+                        help='Log line format; json writes one object per line')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Also log every fetched page and asset')
+    parser.add_argument('--browser-address', type=str, metavar='HOST:PORT',
+                        help='Attach to a running Chrome with remote debugging (see the browser subcommand)')
+    parser.add_argument('--pool-size', type=int, default=10, help='Keep-alive connections per host')
+    parser.add_argument('--asset-concurrency', type=int, default=1, help='Assets downloaded in parallel')
+    parser.add_argument('--http2', action='store_true', help='Use HTTP/2 where available (requires httpx[http2])')
+    parser.add_argument('--dns-cache-ttl', type=float, default=0.0,
+                        help='Cache DNS lookups for this many seconds; replaces socket.getaddrinfo process-wide '
+                             '(default: 0, off)')
+    parser.add_argument('--no-render-cache', action='store_true',
+                        help='Always re-render pages with Selenium, even if their raw HTML is unchanged')
+    parser.add_argument('--page-timeout', type=float, default=60.0,
+                        help='Total seconds a page fetch or browser page load may take')
+    parser.add_argument('--asset-timeout', type=float, default=120.0,
+                        help='Total seconds an asset download may take')
+    parser.add_argument('--record', type=str, default=None, metavar='DIR',
+                        help='Record every HTTP response (and rendered DOM) into this cassette directory')
+    parser.add_argument('--replay', type=str, default=None, metavar='DIR',
+                        help='Serve the crawl from a recorded cassette, with no network access')
+    parser.add_argument('--time-budget', type=float, default=None, metavar='SECONDS',
+                        help='Stop taking new pages after this many seconds, shedding renders and media as it nears')
+    parser.add_argument('--byte-budget', type=parse_byte_size, default=None, metavar='SIZE',
+                        help='Total download budget, e.g. 500M or 2G')
+    parser.add_argument('--host-byte-budget', type=parse_byte_size, default=None, metavar='SIZE',
+                        help='Download budget per host, e.g. 200M')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the crawl (sampled stacks + allocations per stage) into the output directory')
+    parser.add_argument('--srcset-policy', type=str, default='largest',
+                        help='Responsive image variants to download: largest, smallest, all, sizes or a target width in px')
+    parser.add_argument('--asset-host', action='append', default=[], metavar='PATTERN',
+                        help='Extra external asset host to download from (glob, or re:<regex>); repeatable')
+    parser.add_argument('--site-config', type=str, help='JSON file with per-site settings such as asset_hosts')
+    parser.add_argument('--optimize-images', action='store_true',
+                        help='Transcode downloaded images to resized, metadata-free variants (requires Pillow)')
+    parser.add_argument('--image-formats', type=str, default='webp', help='Comma-separated optimized formats: webp, avif')
+    parser.add_argument('--image-widths', type=str, default='480,960,1600', help='Comma-separated variant widths in pixels')
+    parser.add_argument('--export-dir', type=str,
+                        help='After crawling, write changed pages as JSON content bundles to this directory')
+    parser.add_argument('--keep-boilerplate', action='store_true',
+                        help='Do not strip repeated site template text (nav, footer) from page text')
+    parser.add_argument('--no-search-index', action='store_true', help='Do not build the full-text search index')
+    parser.add_argument('--storage', type=str, default=None, metavar='URL',
+                        help='Also publish output to object storage, e.g. s3://bucket/prefix (requires boto3)')
+    parser.add_argument('--s3-endpoint', type=str, default=None, metavar='URL',
+                        help='S3-compatible endpoint such as a MinIO server (default: AWS)')
+    parser.add_argument('--upload-concurrency', type=int, default=8, help='Parallel uploads to object storage')
+    parser.add_argument('--no-platform-api', action='store_true',
+                        help="Render Squarespace pages instead of reading their ?format=json content")
+    parser.add_argument('--check-links', action='store_true',
+                        help='After crawling, check every internal and external link and write link_report.json')
+    parser.add_argument('--link-workers', type=int, default=16, help='Concurrent link checks (default: 16)')
+    parser.add_argument('--link-cache-ttl', type=float, default=86400.0, metavar='SECONDS',
+                        help='Reuse link check results younger than this (default: one day)')
+    parser.add_argument('--offline-mirror', action='store_true',
+                        help='After crawling, write a relinked self-contained copy to <output>/mirror')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes for image optimisation and post-processing (default: CPU count)')
     
     args = parser.parse_args()
+    try:
+        validate_srcset_policy(args.srcset_policy)
+    except ValueError as e:
+        parser.error(f"--srcset-policy: {e}")
     
     global logger
-    logger = setup_logging(args.log)
+    logger = setup_logging(args.log, args.log_format, args.verbose)
     
-    scraper = WebsiteScraper(args.url, args.output, args.delay)
+    site_config = None
+    if args.site_config:
+        site_config = json.loads(Path(args.site_config).read_text(encoding='utf-8'))
+    host_policy = AssetHostPolicy.for_site(urlparse(args.url).netloc, args.asset_host, site_config)
+    
+    image_formats = [f.strip().lower() for f in args.image_formats.split(',') if f.strip()]
+    unknown_formats = set(image_formats) - set(IMAGE_SAVE_OPTIONS)
+    if unknown_formats:
+        parser.error(f"Unsupported --image-formats: {', '.join(sorted(unknown_formats))}")
+    image_widths = [int(w) for w in args.image_widths.split(',') if w.strip()]
+    
+    if args.record and args.replay:
+        parser.error("--record and --replay are mutually exclusive")
+    cassette = None
+    if args.record:
+        cassette = Cassette(Path(args.record), 'record')
+    elif args.replay:
+        try:
+            cassette = Cassette(Path(args.replay), 'replay')
+        except FileNotFoundError as e:
+            parser.error(str(e))
+    
+    try:
+        storage = open_storage(Path(args.output), args.storage, endpoint_url=args.s3_endpoint,
+                               concurrency=args.upload_concurrency) if args.storage else None
+    except ValueError as e:
+        parser.error(str(e))
+    
+    budget = None
+    if args.time_budget or args.byte_budget or args.host_byte_budget:
+        budget = CrawlBudget(args.time_budget, args.byte_budget, args.host_byte_budget)
+    
+    scraper = WebsiteScraper(args.url, args.output, args.delay, srcset_policy=args.srcset_policy,
+                             asset_host_policy=host_policy, optimize_images=args.optimize_images,
+                             image_formats=image_formats, image_widths=image_widths, workers=args.workers,
+                             search_index=not args.no_search_index, browser_address=args.browser_address,
+                             pool_size=args.pool_size, asset_concurrency=args.asset_concurrency,
+                             http2=args.http2, dns_cache_ttl=args.dns_cache_ttl,
+                             render_cache=not args.no_render_cache, profile=args.profile,
+                             budget=budget, detect_boilerplate=not args.keep_boilerplate,
+                             cassette=cassette, page_timeout=args.page_timeout,
+                             asset_timeout=args.asset_timeout, check_links=args.check_links,
+                             link_workers=args.link_workers, link_cache_ttl=args.link_cache_ttl,
+                             storage=storage, platform_api=not args.no_platform_api)
     
     use_selenium = False
     if args.selenium:
         use_selenium = True
-        if not scraper.driver:
+        if not scraper.selenium_available():
             logger.error("Selenium requested but not available. Install with: pip install selenium")
             return
-    elif not args.no_selenium and scraper.driver:
+    elif not args.no_selenium and scraper.selenium_available():
         use_selenium = True
     
     if use_selenium:
@@ -581,14 +4688,21 @@ def main():
     else:
         logger.info("Using standard HTTP requests")
     
+    # iter_pages writes the summary however the crawl ends
     try:
         scraper.scrape_all(max_pages=args.max_pages, use_selenium=use_selenium)
     except KeyboardInterrupt:
-        logger.info("Scraping interrupted by user")
-        scraper._save_summary()
+        logger.info("Scraping interrupted by user (link check skipped)")
     except Exception as e:
         logger.error(f"Error during scraping: {e}", exc_info=True)
-        scraper._save_summary()
+    
+    if args.offline_mirror:
+        build_offline_mirror(args.output, workers=args.workers)
+        if scraper.storage.remote:
+            scraper.storage.put_tree(MIRROR_DIR, Path(args.output) / MIRROR_DIR)
+    scraper.storage.close()
+    if args.export_dir:
+        export_content_bundles(args.output, args.export_dir)
 
 
 if __name__ == "__main__":